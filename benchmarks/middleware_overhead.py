@@ -0,0 +1,139 @@
+"""Measure the per-request overhead of `ClientCacheMiddleware`.
+
+The ASGI application is called directly, without a server or HTTP client, so the timings only include the
+application and its middleware. `PreviousClientCacheMiddleware` is `ClientCacheMiddleware` as it was before
+it became an ASGI middleware, built on Starlette's `BaseHTTPMiddleware`; the pass-through row isolates the
+cost of that base class.
+
+Usage: `python -m benchmarks.middleware_overhead [requests]`, from the repository root.
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message
+
+from src.app.core.utils.etag import etag_matches, make_etag
+from src.app.middleware.client_cache_middleware import _NOT_MODIFIED_HEADERS, ClientCacheMiddleware, _route_policy
+
+
+class PassThroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        return await call_next(request)
+
+
+class PreviousClientCacheMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: ASGIApp, max_age: int = 60) -> None:
+        super().__init__(app)
+        self.max_age = max_age
+
+    def policy(self, request: Request, response: Response) -> str:
+        route_policy = _route_policy(request.scope)
+        if route_policy is not None:
+            return route_policy
+
+        if request.method not in ("GET", "HEAD") or response.status_code >= 400:
+            return "no-store"
+
+        if "authorization" in request.headers:
+            return "private, no-cache"
+
+        return f"public, max-age={self.max_age}"
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response: Response = await call_next(request)
+        policy = response.headers.get("cache-control") or self.policy(request, response)
+        response.headers["Cache-Control"] = policy
+        if "authorization" in request.headers and policy.startswith("private"):
+            response.headers.add_vary_header("Authorization")
+
+        if request.method != "GET" or response.status_code != 200 or "no-store" in policy:
+            return response
+
+        etag = response.headers.get("etag")
+        if etag is None:
+            body = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore[attr-defined]
+            etag = make_etag(body)
+            response = Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+            response.headers["ETag"] = etag
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            headers = {name: value for name, value in response.headers.items() if name in _NOT_MODIFIED_HEADERS}
+            return Response(status_code=304, headers=headers)
+
+        return response
+
+
+def build_app(*middlewares: type) -> FastAPI:
+    application = FastAPI()
+
+    @application.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict:
+        return {"id": item_id, "name": "item"}
+
+    for middleware in middlewares:
+        application.add_middleware(middleware)
+    return application
+
+
+async def measure(app: ASGIApp, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def send(message: Message) -> None:
+        pass
+
+    async def request() -> None:
+        received = False
+
+        async def receive() -> Message:
+            nonlocal received
+            if received:
+                await asyncio.Event().wait()
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(requests // 10):
+        await request()
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await request()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    apps = {
+        "no middleware": build_app(),
+        "BaseHTTPMiddleware (pass-through)": build_app(PassThroughMiddleware),
+        "ClientCacheMiddleware (previous)": build_app(PreviousClientCacheMiddleware),
+        "ClientCacheMiddleware (ASGI)": build_app(ClientCacheMiddleware),
+    }
+    baseline = None
+    for name, app in apps.items():
+        per_request = await measure(app, requests)
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<36} {per_request:8.1f} us/request  {per_request - baseline:+8.1f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
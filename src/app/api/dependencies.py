@@ -2,33 +2,72 @@ from typing import Annotated, Any
 
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..crud.crud_permissions import crud_permissions
-from ..models.role_permission import RolePermission
-
-from ..schemas.permission import  PermissionRead
-from ..schemas.role_permission import RolePermissionRead
 
+from ..core.config import settings
 from ..core.db.database import async_get_db
 from ..core.exceptions.http_exceptions import ForbiddenException, UnauthorizedException
 from ..core.logger import logging
 from ..core.security import oauth2_scheme, verify_token
+from ..core.utils import cache, cache_warmer, rate_limit, rbac
 from ..crud.crud_users import crud_users
 from ..models.user import User
+from ..schemas.user import UserPrincipal
 
 logger = logging.getLogger(__name__)
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(async_get_db)]
-) -> dict[str, Any] | None:
+
+def _principal_key(subject: str) -> str:
+    return f"principal:{subject}"
+
+
+async def invalidate_principal(user: dict[str, Any]) -> None:
+    """Evict the cached principal of a user, under both subjects (username and email) a token may carry.
+
+    Call it after any write changing what `get_current_user` returns for the user, including deletions.
+    """
+    if cache.backend is None:
+        return
+
+    await cache.invalidate([_principal_key(user["username"]), _principal_key(user["email"])])
+
+
+async def _authenticate(request: Request, token: str, db: AsyncSession) -> dict[str, Any] | None:
+    """Return the user a token authenticates, or None, verifying the token and loading the user once per request.
+
+    The outcome is kept in `request.state`, so the dependencies of a route that all need the user, e.g.
+    `requires_permission` and `get_current_user`, share a single decode, revocation check and lookup.
+    """
+    resolved = getattr(request.state, "auth", None)
+    if resolved is not None and resolved[0] == token:
+        return resolved[1]
+
+    user: dict | None = None
     token_data = await verify_token(token, db)
-    if token_data is None:
-        raise UnauthorizedException("User not authenticated.")
+    if token_data is not None:
+        subject = token_data.username_or_email
 
-    if "@" in token_data.username_or_email:
-        user: dict | None = await crud_users.get(db=db, email=token_data.username_or_email, is_deleted=False)
-    else:
-        user = await crud_users.get(db=db, username=token_data.username_or_email, is_deleted=False)
+        async def load_user() -> dict | None:
+            if "@" in subject:
+                return await crud_users.get(db=db, schema_to_select=UserPrincipal, email=subject, is_deleted=False)
+            return await crud_users.get(db=db, schema_to_select=UserPrincipal, username=subject, is_deleted=False)
 
+        user = await cache.get_or_load(
+            _principal_key(subject),
+            load_user,
+            expiration=settings.CACHE_PRINCIPAL_EXPIRATION,
+            local_expiration=settings.CACHE_PRINCIPAL_LOCAL_EXPIRATION,
+        )
+
+    request.state.auth = (token, user)
+    return user
+
+
+async def get_current_user(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+) -> dict[str, Any] | None:
+    user = await _authenticate(request, token, db)
     if user:
         return user
 
@@ -45,16 +84,7 @@ async def get_optional_user(request: Request, db: AsyncSession = Depends(async_g
         if token_type.lower() != "bearer" or not token_value:
             return None
 
-        token_data = await verify_token(token_value, db)
-        if token_data is None:
-            return None
-
-        return await get_current_user(token_value, db=db)
-
-    except HTTPException as http_exc:
-        if http_exc.status_code != 401:
-            logger.error(f"Unexpected HTTPException in get_optional_user: {http_exc.detail}")
-        return None
+        return await _authenticate(request, token_value, db)
 
     except Exception as exc:
         logger.error(f"Unexpected error in get_optional_user: {exc}")
@@ -73,18 +103,50 @@ def requires_permission(permission_name: str):
         db: AsyncSession = Depends(async_get_db), 
         user: User | None = Depends(get_optional_user)
     ):
-        user_permission: dict = await crud_permissions.get_joined(
-            db=db,
-            join_model=RolePermission,
-            join_prefix="rp_",
-            schema_to_select=PermissionRead,
-            join_schema_to_select=RolePermissionRead,
-            join_type="inner",
-            role_id=user["role_id"], 
-            name = permission_name,  
-        ) 
-        
-        if user_permission is None:            
+        role_id = user["role_id"] if user else None
+        if not await rbac.has_permission(db, role_id, permission_name):
             raise HTTPException(status_code=403, detail="Not enough permissions")
        
     return permission_checker
+
+
+def rate_limiter(limit: int | None = None, period: int | None = None):
+    """Limit the requests to a route for each user, or each client IP address for anonymous requests.
+
+    Parameters
+    ----------
+    limit: int | None, optional
+        The maximum number of requests in any `period`. Defaults to `DEFAULT_RATE_LIMIT_LIMIT`.
+    period: int | None, optional
+        The length of the window, in seconds. Defaults to `DEFAULT_RATE_LIMIT_PERIOD`.
+
+    Note
+    ----
+        - Rejected requests get a 429 response, with a `Retry-After` header.
+        - The limit is checked before the route's other work, including cache lookups, see `rate_limit.check`.
+        - Behind a reverse proxy, list it in `RATE_LIMIT_TRUSTED_PROXIES`, so anonymous clients are told apart
+          by `X-Forwarded-For` instead of all sharing the proxy's address (see `rate_limit.client_address`).
+        - Cache warm-up requests are not limited.
+    """
+    limit = limit or settings.DEFAULT_RATE_LIMIT_LIMIT
+    period = period or settings.DEFAULT_RATE_LIMIT_PERIOD
+
+    async def limit_rate(request: Request, user: dict | None = Depends(get_optional_user)) -> None:
+        if cache_warmer.warming.get():
+            return
+
+        if user:
+            client = f"user:{user['id']}"
+        else:
+            peer = request.client.host if request.client else None
+            client = f"ip:{rate_limit.client_address(peer, request.headers.get('x-forwarded-for'))}"
+        route = request.scope.get("route")
+        path = route.path if route is not None else request.url.path
+
+        retry_after = await rate_limit.check(f"{request.method}:{path}:{client}", limit, period)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429, detail="Rate limit exceeded.", headers={"Retry-After": str(retry_after)}
+            )
+
+    return limit_rate
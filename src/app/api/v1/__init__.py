@@ -8,6 +8,8 @@ from .categories import router as categories_router
 from .roles import router as roles_router
 from .permissions import router as permissions_router
 from .role_permissions import router as role_permissions_router
+from .cache import router as cache_router
+from .password_hashing import router as password_hashing_router
 
 router = APIRouter(prefix="/v1")
 router.include_router(login_router)
@@ -18,3 +20,5 @@ router.include_router(categories_router)
 router.include_router(roles_router)
 router.include_router(permissions_router)
 router.include_router(role_permissions_router)
+router.include_router(cache_router)
+router.include_router(password_hashing_router)
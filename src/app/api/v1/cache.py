@@ -0,0 +1,47 @@
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Query, Request, status
+
+from ...api.dependencies import get_current_superuser
+from ...core.config import settings
+from ...core.exceptions.http_exceptions import CustomException
+from ...core.utils import cache, cache_metrics
+from ...core.utils.cache_metrics import merge_snapshots, publish_metrics, read_metrics, sample_memory_by_prefix
+from ...middleware.client_cache_middleware import cache_control
+
+router = APIRouter(tags=["cache"])
+
+
+@router.get("/cache/metrics", dependencies=[Depends(get_current_superuser)])
+@cache_control("no-store")
+async def read_cache_metrics(request: Request) -> dict[str, Any]:
+    if cache.client is None:
+        return merge_snapshots([cache_metrics.metrics.snapshot()])
+
+    await publish_metrics(cache.client)
+    metrics: dict[str, Any] = await read_metrics(cache.client, max_age=settings.CACHE_METRICS_INTERVAL * 3)
+    return metrics
+
+
+@router.get("/cache/hot-keys", dependencies=[Depends(get_current_superuser)])
+@cache_control("no-store")
+async def read_cache_hot_keys(
+    request: Request, limit: Annotated[int, Query(ge=1, le=1000)] = 20
+) -> list[dict[str, Any]]:
+    metrics = await read_cache_metrics(request)
+    hot_keys: list[dict[str, Any]] = metrics["hot_keys"][:limit]
+    return hot_keys
+
+
+@router.get("/cache/memory", dependencies=[Depends(get_current_superuser)])
+@cache_control("no-store")
+async def read_cache_memory(
+    request: Request, sample_size: Annotated[int, Query(ge=1, le=10000)] = 1000
+) -> dict[str, Any]:
+    if cache.client is None:
+        raise CustomException(status.HTTP_501_NOT_IMPLEMENTED, "Memory sampling requires the Redis cache backend.")
+
+    memory: dict[str, Any] = await sample_memory_by_prefix(
+        cache.client, cache.registered_prefixes, sample_size=sample_size
+    )
+    return memory
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, Request
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...api.dependencies import get_current_superuser
+from ...api.dependencies import get_current_superuser, rate_limiter
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
 from ...crud.crud_categories import crud_categories
@@ -27,7 +27,11 @@ async def write_category(
     return created_category
 
 
-@router.get("/categories", response_model=PaginatedListResponse[CategoryRead])
+@router.get(
+    "/categories",
+    response_model=PaginatedListResponse[CategoryRead],
+    dependencies=[Depends(rate_limiter(limit=100, period=60))],
+)
 async def read_categories(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], page: int = 1, items_per_page: int = 10
 ) -> dict:
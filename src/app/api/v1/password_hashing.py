@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, Request
+
+from ...api.dependencies import get_current_superuser
+from ...core.utils import password_hashing
+from ...middleware.client_cache_middleware import cache_control
+
+router = APIRouter(tags=["password hashing"])
+
+
+@router.get("/password-hashing/metrics", dependencies=[Depends(get_current_superuser)])
+@cache_control("no-store")
+async def read_password_hashing_metrics(request: Request) -> dict[str, Any]:
+    return password_hashing.metrics.snapshot()
@@ -9,9 +9,10 @@ from ...models.role_permission import RolePermission
 from ...schemas.role import RoleRead
 from ...schemas.role_permission import RolePermissionRead
 
-from ...api.dependencies import get_current_superuser
+from ...api.dependencies import get_current_superuser, rate_limiter
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ...core.utils import rbac
 from ...crud.crud_permissions import crud_permissions
 from ...schemas.permission import PermissionCreate, PermissionCreateInternal, PermissionRead, PermissionUpdate
 
@@ -29,10 +30,15 @@ async def write_permission(
 
     permission_internal = PermissionCreateInternal(**permission_internal_dict)
     created_permission: PermissionRead = await crud_permissions.create(db=db, object=permission_internal)
+    await rbac.bump_version()
     return created_permission
 
 
-@router.get("/permissions", response_model=PaginatedListResponse[PermissionRead])
+@router.get(
+    "/permissions",
+    response_model=PaginatedListResponse[PermissionRead],
+    dependencies=[Depends(rate_limiter(limit=100, period=60))],
+)
 async def read_permissions(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], page: int = 1, items_per_page: int = 10
 ) -> dict:
@@ -85,6 +91,7 @@ async def patch_permission(
         raise NotFoundException("Permission not found")
 
     await crud_permissions.update(db=db, object=values, name=name)
+    await rbac.bump_version()
     return {"message": "Permission updated"}
 
 
@@ -95,4 +102,5 @@ async def erase_permission(request: Request, name: str, db: Annotated[AsyncSessi
         raise NotFoundException("Permission not found")
 
     await crud_permissions.delete(db=db, name=name)
+    await rbac.bump_version()
     return {"message": "Permission deleted"}
@@ -4,10 +4,11 @@ from fastapi import APIRouter, Depends, Request
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...api.dependencies import get_current_superuser, get_current_user, requires_permission
+from ...api.dependencies import get_current_superuser, get_current_user, rate_limiter, requires_permission
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import NotFoundException
-from ...core.utils.cache import cache
+from ...core.utils import cache as cache_module
+from ...core.utils.cache import cache, invalidate
 from ...crud.crud_products import crud_products
 from ...schemas.product import ProductCreate, ProductCreateInternal, ProductRead, ProductUpdate
 from ...schemas.user import UserRead
@@ -31,15 +32,26 @@ async def write_product(
 
     post_internal = ProductCreateInternal(**product_internal_dict)
     created_product: ProductRead = await crud_products.create(db=db, object=post_internal)
+    if cache_module.backend is not None:
+        await invalidate([f"product_cache:{created_product.id}"], namespaces=["products"])
     return created_product
 
 
-@router.get("/products", response_model=PaginatedListResponse[ProductRead])
+@router.get(
+    "/products",
+    response_model=PaginatedListResponse[ProductRead],
+    dependencies=[Depends(rate_limiter(limit=100, period=60))],
+)
 @cache(
-    key_prefix="products:page_{page}:items_per_page:{items_per_page}",   
-    expiration=60,
+    key_prefix="products:items_per_page_{items_per_page}:page",
+    resource_id_name="page",
+    expiration=3600,
+    stale_ttl=60,
+    local_expiration=5,
+    namespace="products",
 )
 async def read_products(
+    request: Request,
     db: Annotated[AsyncSession, Depends(async_get_db)],
     page: int = 1,
     items_per_page: int = 10,
@@ -57,7 +69,7 @@ async def read_products(
 
 
 @router.get("/product/{id}", response_model=ProductRead)
-@cache(key_prefix="product_cache", resource_id_name="id")
+@cache(key_prefix="product_cache", resource_id_name="id", local_expiration=30, negative_expiration=30)
 async def read_product(
     request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict:
@@ -71,8 +83,9 @@ async def read_product(
 
 
 @router.patch("/product/{id}", dependencies=[Depends(requires_permission('product.update'))])
-@cache("product_cache", resource_id_name="id", pattern_to_invalidate_extra=["products:*"])
+@cache("product_cache", resource_id_name="id", namespaces_to_invalidate=["products"], rewarm=True)
 async def patch_post(   
+    request: Request,
     id: int,
     values: ProductUpdate,
     current_user: Annotated[UserRead, Depends(get_current_user)],
@@ -87,8 +100,9 @@ async def patch_post(
 
 
 @router.delete("/product/{id}", dependencies=[Depends(requires_permission('product.delete'))])
-@cache("product_cache", resource_id_name="id")
+@cache("product_cache", resource_id_name="id", namespaces_to_invalidate=["products"], rewarm=True)
 async def erase_product(   
+    request: Request,
     id: int,
     current_user: Annotated[UserRead, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
@@ -103,9 +117,9 @@ async def erase_product(
 
 
 @router.delete("/db_product/{id}", dependencies=[Depends(get_current_superuser)])
-@cache("product_cache", resource_id_name="id")
+@cache("product_cache", resource_id_name="id", namespaces_to_invalidate=["products"], rewarm=True)
 async def erase_db_product(
-    id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
+    request: Request, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:    
     db_product = await crud_products.get(db=db, schema_to_select=ProductRead, id=id, is_deleted=False)
     if db_product is None:
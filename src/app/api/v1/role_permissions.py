@@ -8,6 +8,7 @@ from ...schemas.role import RoleRead
 from ...api.dependencies import get_current_superuser
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ...core.utils import rbac
 from ...crud.crud_role_permissions import crud_role_permissions
 from ...schemas.role_permission import RolePermissionCreate, RolePermissionCreateInternal, RolePermissionRead
 
@@ -29,6 +30,7 @@ async def write_role_permission(
 
     role_permission_internal = RolePermissionCreateInternal(**role_permission_internal_dict)
     created_role_permission: RolePermissionRead = await crud_role_permissions.create(db=db, object=role_permission_internal)
+    await rbac.bump_version()
     return created_role_permission
     
 
@@ -39,4 +41,5 @@ async def erase_role_permission(request: Request, id: int, db: Annotated[AsyncSe
         raise NotFoundException("Role Permission not found")
 
     await crud_role_permissions.delete(db=db, id=id)
+    await rbac.bump_version()
     return {"message": "Role Permission deleted"}
@@ -4,9 +4,10 @@ from fastapi import APIRouter, Depends, Request
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...api.dependencies import get_current_superuser
+from ...api.dependencies import get_current_superuser, rate_limiter
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ...core.utils import rbac
 from ...crud.crud_roles import crud_roles   
 from ...schemas.role import RoleCreate, RoleCreateInternal, RoleRead, RoleUpdate
 
@@ -24,10 +25,15 @@ async def write_role(
 
     role_internal = RoleCreateInternal(**role_internal_dict)
     created_role: RoleRead = await crud_roles.create(db=db, object=role_internal)
+    await rbac.bump_version()
     return created_role
 
 
-@router.get("/roles", response_model=PaginatedListResponse[RoleRead])
+@router.get(
+    "/roles",
+    response_model=PaginatedListResponse[RoleRead],
+    dependencies=[Depends(rate_limiter(limit=100, period=60))],
+)
 async def read_roles(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], page: int = 1, items_per_page: int = 10
 ) -> dict:
@@ -57,6 +63,7 @@ async def patch_role(
         raise NotFoundException("Role not found")
 
     await crud_roles.update(db=db, object=values, name=name)
+    await rbac.bump_version()
     return {"message": "Role updated"}
 
 
@@ -67,4 +74,5 @@ async def erase_role(request: Request, name: str, db: Annotated[AsyncSession, De
         raise NotFoundException("Role not found")
 
     await crud_roles.delete(db=db, name=name)
+    await rbac.bump_version()
     return {"message": "Role deleted"}
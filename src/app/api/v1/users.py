@@ -7,18 +7,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ...models.role import Role
 from ...schemas.role import RoleRead
 
-from ...api.dependencies import get_current_superuser, get_current_user
+from ...api.dependencies import get_current_superuser, get_current_user, invalidate_principal, rate_limiter
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, ForbiddenException, NotFoundException
 from ...core.security import blacklist_token, get_password_hash, oauth2_scheme
 from ...crud.crud_roles import crud_roles
 from ...crud.crud_users import crud_users
+from ...middleware.client_cache_middleware import cache_control
 from ...schemas.user import UserCreate, UserCreateInternal, UserRead, UserRoleUpdate, UserUpdate
 
 router = APIRouter(tags=["users"])
 
 
-@router.post("/user", response_model=UserRead, status_code=201)
+@router.post("/user", response_model=UserRead, status_code=201, dependencies=[Depends(rate_limiter())])
 async def write_user(
     request: Request, user: UserCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> UserRead:
@@ -31,7 +32,7 @@ async def write_user(
         raise DuplicateValueException("Username not available")
 
     user_internal_dict = user.model_dump()
-    user_internal_dict["hashed_password"] = get_password_hash(password=user_internal_dict["password"])
+    user_internal_dict["hashed_password"] = await get_password_hash(password=user_internal_dict["password"])
     del user_internal_dict["password"]
 
     user_internal = UserCreateInternal(**user_internal_dict)    
@@ -39,7 +40,11 @@ async def write_user(
     return created_user
 
 
-@router.get("/users", response_model=PaginatedListResponse[UserRead])
+@router.get(
+    "/users",
+    response_model=PaginatedListResponse[UserRead],
+    dependencies=[Depends(rate_limiter(limit=100, period=60))],
+)
 async def read_users(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], page: int = 1, items_per_page: int = 10
 ) -> dict:
@@ -56,6 +61,7 @@ async def read_users(
 
 
 @router.get("/user/me/", response_model=UserRead)
+@cache_control("private, no-cache")
 async def read_users_me(request: Request, current_user: Annotated[UserRead, Depends(get_current_user)]) -> UserRead:
     return current_user
 
@@ -97,6 +103,7 @@ async def patch_user(
             raise DuplicateValueException("Email is already registered")
 
     await crud_users.update(db=db, object=values, username=username)
+    await invalidate_principal(db_user)
     return {"message": "User updated"}
 
 
@@ -116,6 +123,7 @@ async def erase_user(
         raise ForbiddenException()
 
     await crud_users.delete(db=db, username=username)
+    await invalidate_principal(db_user)
     await blacklist_token(token=token, db=db)
     return {"message": "User deleted"}
 
@@ -127,11 +135,12 @@ async def erase_db_user(
     db: Annotated[AsyncSession, Depends(async_get_db)],
     token: str = Depends(oauth2_scheme),
 ) -> dict[str, str]:
-    db_user = await crud_users.exists(db=db, username=username)
+    db_user = await crud_users.get(db=db, schema_to_select=UserRead, username=username)
     if not db_user:
         raise NotFoundException("User not found")
 
     await crud_users.db_delete(db=db, username=username)
+    await invalidate_principal(db_user)
     await blacklist_token(token=token, db=db)
     return {"message": "User deleted from the database"}
 
@@ -172,4 +181,5 @@ async def patch_user_role(
         raise NotFoundException("Role not found")
 
     await crud_users.update(db=db, object=values, username=username)
+    await invalidate_principal(db_user)
     return {"message": f"User {db_user['name']} Role updated"}
@@ -23,6 +23,8 @@ class CryptSettings(BaseSettings):
     ALGORITHM: str = config("ALGORITHM", default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30)
     REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", default=7)
+    BCRYPT_ROUNDS: int = config("BCRYPT_ROUNDS", default=12)
+    PASSWORD_HASHING_WORKERS: int = config("PASSWORD_HASHING_WORKERS", default=4)
 
 
 class DatabaseSettings(BaseSettings):
@@ -74,12 +76,55 @@ class RedisCacheSettings(BaseSettings):
     REDIS_CACHE_HOST: str = config("REDIS_CACHE_HOST", default="localhost")
     REDIS_CACHE_PORT: int = config("REDIS_CACHE_PORT", default=6379)
     REDIS_CACHE_URL: str = f"redis://{REDIS_CACHE_HOST}:{REDIS_CACHE_PORT}"
+    CACHE_BACKEND: str = config("CACHE_BACKEND", default="redis")
+    CACHE_DISK_PATH: str = config("CACHE_DISK_PATH", default="cache.sqlite3")
+    CACHE_REDIS_SOCKET_TIMEOUT: float = config("CACHE_REDIS_SOCKET_TIMEOUT", default=0.25)
+    CACHE_REDIS_CONNECT_TIMEOUT: float = config("CACHE_REDIS_CONNECT_TIMEOUT", default=0.25)
+    CACHE_REDIS_RETRIES: int = config("CACHE_REDIS_RETRIES", default=1)
+    CACHE_REDIS_RETRY_BACKOFF: float = config("CACHE_REDIS_RETRY_BACKOFF", default=0.05)
+    CACHE_BREAKER_FAILURE_THRESHOLD: int = config("CACHE_BREAKER_FAILURE_THRESHOLD", default=5)
+    CACHE_BREAKER_RECOVERY_TIMEOUT: float = config("CACHE_BREAKER_RECOVERY_TIMEOUT", default=10.0)
+    CACHE_MAX_PENDING_INVALIDATIONS: int = config("CACHE_MAX_PENDING_INVALIDATIONS", default=10000)
+    CACHE_LOCAL_ENABLED: bool = config("CACHE_LOCAL_ENABLED", default=True)
+    CACHE_LOCAL_MAX_ENTRIES: int = config("CACHE_LOCAL_MAX_ENTRIES", default=1024)
+    CACHE_LOCAL_MAX_BYTES: int = config("CACHE_LOCAL_MAX_BYTES", default=64 * 1024 * 1024)
+    CACHE_INVALIDATION_CHANNEL: str = config("CACHE_INVALIDATION_CHANNEL", default="cache:invalidations")
+    CACHE_LOCK_TIMEOUT: float = config("CACHE_LOCK_TIMEOUT", default=10.0)
+    CACHE_LOCK_POLL_INTERVAL: float = config("CACHE_LOCK_POLL_INTERVAL", default=0.05)
+    CACHE_CODEC: str = config("CACHE_CODEC", default="gzip")
+    CACHE_COMPRESSION_THRESHOLD: int = config("CACHE_COMPRESSION_THRESHOLD", default=1024)
+    CACHE_FENCE_TTL: int = config("CACHE_FENCE_TTL", default=3600)
+    CACHE_METRICS_INTERVAL: float = config("CACHE_METRICS_INTERVAL", default=15.0)
+    CACHE_HOT_KEYS_TOP_K: int = config("CACHE_HOT_KEYS_TOP_K", default=50)
+    CACHE_PRINCIPAL_EXPIRATION: int = config("CACHE_PRINCIPAL_EXPIRATION", default=60)
+    CACHE_PRINCIPAL_LOCAL_EXPIRATION: int = config("CACHE_PRINCIPAL_LOCAL_EXPIRATION", default=10)
+    CACHE_WARMUP_PATHS: str = config(
+        "CACHE_WARMUP_PATHS", default="/api/v1/products,/api/v1/products?page=2,/api/v1/products?page=3"
+    )
+    CACHE_WARMUP_CONCURRENCY: int = config("CACHE_WARMUP_CONCURRENCY", default=4)
 
 
 class ClientSideCacheSettings(BaseSettings):
     CLIENT_CACHE_MAX_AGE: int = config("CLIENT_CACHE_MAX_AGE", default=60)
 
 
+class CompressionSettings(BaseSettings):
+    COMPRESSION_MINIMUM_SIZE: int = config("COMPRESSION_MINIMUM_SIZE", default=1024)
+    COMPRESSION_ENCODINGS: str = config("COMPRESSION_ENCODINGS", default="zstd,br,gzip")
+    COMPRESSION_STREAMING: bool = config("COMPRESSION_STREAMING", default=True)
+
+
+class RedisTokenBlacklistSettings(BaseSettings):
+    REDIS_TOKEN_BLACKLIST_HOST: str = config("REDIS_TOKEN_BLACKLIST_HOST", default="localhost")
+    REDIS_TOKEN_BLACKLIST_PORT: int = config("REDIS_TOKEN_BLACKLIST_PORT", default=6379)
+    REDIS_TOKEN_BLACKLIST_URL: str = f"redis://{REDIS_TOKEN_BLACKLIST_HOST}:{REDIS_TOKEN_BLACKLIST_PORT}"
+    TOKEN_BLACKLIST_CHANNEL: str = config("TOKEN_BLACKLIST_CHANNEL", default="token_blacklist:revocations")
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = config("TOKEN_BLACKLIST_BLOOM_CAPACITY", default=100000)
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = config("TOKEN_BLACKLIST_BLOOM_ERROR_RATE", default=0.001)
+    TOKEN_BLACKLIST_REBUILD_INTERVAL: float = config("TOKEN_BLACKLIST_REBUILD_INTERVAL", default=3600.0)
+    TOKEN_BLACKLIST_PURGE_INTERVAL: float = config("TOKEN_BLACKLIST_PURGE_INTERVAL", default=3600.0)
+
+
 class RedisQueueSettings(BaseSettings):
     REDIS_QUEUE_HOST: str = config("REDIS_QUEUE_HOST", default="localhost")
     REDIS_QUEUE_PORT: int = config("REDIS_QUEUE_PORT", default=6379)
@@ -89,6 +134,8 @@ class RedisRateLimiterSettings(BaseSettings):
     REDIS_RATE_LIMIT_HOST: str = config("REDIS_RATE_LIMIT_HOST", default="localhost")
     REDIS_RATE_LIMIT_PORT: int = config("REDIS_RATE_LIMIT_PORT", default=6379)
     REDIS_RATE_LIMIT_URL: str = f"redis://{REDIS_RATE_LIMIT_HOST}:{REDIS_RATE_LIMIT_PORT}"
+    RATE_LIMIT_LOCAL_SHARE: float = config("RATE_LIMIT_LOCAL_SHARE", default=0.1)
+    RATE_LIMIT_TRUSTED_PROXIES: str = config("RATE_LIMIT_TRUSTED_PROXIES", default="")
 
 
 class DefaultRateLimitSettings(BaseSettings):
@@ -114,6 +161,10 @@ class Settings(
     TestSettings,
     RedisCacheSettings,
     ClientSideCacheSettings,   
+    CompressionSettings,
+    RedisTokenBlacklistSettings,
+    RedisRateLimiterSettings,
+    DefaultRateLimitSettings,
     EnvironmentSettings,
 ):
     pass
@@ -4,6 +4,12 @@ class CacheIdentificationInferenceError(Exception):
         super().__init__(self.message)
 
 
+class CacheKeyTemplateError(Exception):
+    def __init__(self, message: str = "Cache key template references an unknown parameter.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
 class InvalidRequestError(Exception):
     def __init__(self, message: str = "Type of request not supported.") -> None:
         self.message = message
@@ -14,3 +20,15 @@ class MissingClientError(Exception):
     def __init__(self, message: str = "Client is None.") -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class UnknownCodecError(Exception):
+    def __init__(self, message: str = "Cache codec not registered.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class UnknownCacheBackendError(Exception):
+    def __init__(self, message: str = "Cache backend not supported.") -> None:
+        self.message = message
+        super().__init__(self.message)
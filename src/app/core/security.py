@@ -10,23 +10,35 @@ from ..crud.crud_users import crud_users
 from .config import settings
 from .db.crud_token_blacklist import crud_token_blacklist
 from .schemas import TokenBlacklistCreate, TokenData
+from .utils import password_hashing, token_blacklist
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
+BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    correct_password: bool = await password_hashing.run(
+        "verify", bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
     return correct_password
 
 
-def get_password_hash(password: str) -> str:
-    hashed_password: str = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-    return hashed_password
+async def get_password_hash(password: str) -> str:
+    hashed_password: bytes = await password_hashing.run(
+        "hash", bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    )
+    return hashed_password.decode()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with another cost factor than `BCRYPT_ROUNDS`."""
+    _, _, rounds, _ = hashed_password.split("$", 3)
+    return int(rounds) != BCRYPT_ROUNDS
 
 
 async def authenticate_user(username_or_email: str, password: str, db: AsyncSession) -> dict[str, Any] | Literal[False]:
@@ -41,6 +53,11 @@ async def authenticate_user(username_or_email: str, password: str, db: AsyncSess
     elif not await verify_password(password, db_user["hashed_password"]):
         return False
 
+    # the plain password is only known here, so hashes are upgraded to a new cost factor on login
+    if password_needs_rehash(db_user["hashed_password"]):
+        db_user["hashed_password"] = await get_password_hash(password)
+        await crud_users.update(db=db, object={"hashed_password": db_user["hashed_password"]}, id=db_user["id"])
+
     return db_user
 
 
@@ -80,24 +97,37 @@ async def verify_token(token: str, db: AsyncSession) -> TokenData | None:
     -------
     TokenData | None
         TokenData instance if the token is valid, None otherwise.
-    """
-    is_blacklisted = await crud_token_blacklist.exists(db, token=token)
-    if is_blacklisted:
-        return None
 
+    Note
+    ----
+        - The signature is checked before revocation. Revocation is checked against the in-process Bloom
+          filter and Redis (see `token_blacklist`), and only against the database when their answer is unknown.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username_or_email: str = payload.get("sub")
-        role_id: int = payload.get("role_id")
-        if username_or_email is None:
-            return None
-        return TokenData(username_or_email=username_or_email, role_id=role_id)
-
     except JWTError:
         return None
 
+    username_or_email: str = payload.get("sub")
+    role_id: int = payload.get("role_id")
+    if username_or_email is None:
+        return None
+
+    token_hash = token_blacklist.hash_token(token)
+    is_blacklisted = await token_blacklist.is_revoked(token_hash)
+    if is_blacklisted is None:
+        is_blacklisted = await crud_token_blacklist.exists(db, token_hash=token_hash)
+    if is_blacklisted:
+        return None
+
+    return TokenData(username_or_email=username_or_email, role_id=role_id)
+
 
 async def blacklist_token(token: str, db: AsyncSession) -> None:
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     expires_at = datetime.fromtimestamp(payload.get("exp"))
-    await crud_token_blacklist.create(db, object=TokenBlacklistCreate(**{"token": token, "expires_at": expires_at}))
+    token_hash = token_blacklist.hash_token(token)
+    await crud_token_blacklist.create(
+        db, object=TokenBlacklistCreate(**{"token_hash": token_hash, "expires_at": expires_at})
+    )
+    await token_blacklist.revoke(token_hash, expires_at)
@@ -1,4 +1,8 @@
+import asyncio
+import ipaddress
+from collections import deque
 from collections.abc import AsyncGenerator, Callable
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import _AsyncGeneratorContextManager, asynccontextmanager
 from typing import Any
 
@@ -8,20 +12,36 @@ import redis.asyncio as redis
 from fastapi import APIRouter, Depends, FastAPI
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
 from ..api.dependencies import get_current_superuser
 from ..middleware.client_cache_middleware import ClientCacheMiddleware
+from ..middleware.compression_middleware import CompressionMiddleware
 from .config import (
     AppSettings,
     ClientSideCacheSettings,
+    CompressionSettings,
+    CryptSettings,
     DatabaseSettings,    
     EnvironmentOption,
     EnvironmentSettings,
     RedisCacheSettings,   
+    RedisRateLimiterSettings,
+    RedisTokenBlacklistSettings,
     settings,
 )
-from .db.database import Base, async_engine as engine
-from .utils import cache
+from .db.database import Base, async_engine as engine, local_session
+from .exceptions.cache_exceptions import UnknownCacheBackendError
+from .utils import cache, cache_warmer, password_hashing, rate_limit, rbac, token_blacklist
+from .utils.cache_backends import MemoryBackend, RedisBackend, SqliteBackend
+from .utils.cache_codecs import get_codec
+from .utils.cache_metrics import HotKeyTracker, metrics, publish_metrics_periodically
+from .utils.cache_warmer import CacheWarmer
+from .utils.circuit_breaker import CircuitBreaker
+from .utils.local_cache import LocalCache
 from ..models import *
 
 # -------------- database --------------
@@ -30,14 +50,155 @@ async def create_tables() -> None:
         await conn.run_sync(Base.metadata.create_all)
 
 
+# -------------- background tasks --------------
+cache_tasks: set[asyncio.Task] = set()
+token_blacklist_tasks: set[asyncio.Task] = set()
+
+
+async def cancel_background_tasks(tasks: set[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tasks.clear()
+
+
 # -------------- cache --------------
-async def create_redis_cache_pool() -> None:
-    cache.pool = redis.ConnectionPool.from_url(settings.REDIS_CACHE_URL)
+async def create_cache_backend() -> None:
+    cache.lock_timeout = settings.CACHE_LOCK_TIMEOUT
+    cache.lock_poll_interval = settings.CACHE_LOCK_POLL_INTERVAL
+    cache.default_codec = get_codec(settings.CACHE_CODEC).name
+    cache.compression_threshold = settings.CACHE_COMPRESSION_THRESHOLD
+    cache.circuit_breaker = CircuitBreaker(
+        failure_threshold=settings.CACHE_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=settings.CACHE_BREAKER_RECOVERY_TIMEOUT,
+    )
+    cache.pending_invalidations = deque(maxlen=settings.CACHE_MAX_PENDING_INVALIDATIONS)
+    metrics.hot_keys = HotKeyTracker(top_k=settings.CACHE_HOT_KEYS_TOP_K)
+
+    if settings.CACHE_BACKEND == "memory":
+        cache.backend = MemoryBackend(
+            max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+            max_bytes=settings.CACHE_LOCAL_MAX_BYTES,
+            fence_ttl=settings.CACHE_FENCE_TTL,
+        )
+        return
+
+    if settings.CACHE_BACKEND == "disk":
+        cache.backend = SqliteBackend(settings.CACHE_DISK_PATH, fence_ttl=settings.CACHE_FENCE_TTL)
+        return
+
+    if settings.CACHE_BACKEND != "redis":
+        raise UnknownCacheBackendError(f"Cache backend '{settings.CACHE_BACKEND}' not supported.")
+
+    cache.pool = redis.ConnectionPool.from_url(
+        settings.REDIS_CACHE_URL,
+        socket_timeout=settings.CACHE_REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.CACHE_REDIS_CONNECT_TIMEOUT,
+        retry=Retry(ExponentialBackoff(base=settings.CACHE_REDIS_RETRY_BACKOFF), settings.CACHE_REDIS_RETRIES),
+        retry_on_error=[RedisConnectionError, RedisTimeoutError],
+    )
     cache.client = redis.Redis.from_pool(cache.pool)  # type: ignore
+    cache.backend = RedisBackend(cache.client, fence_ttl=settings.CACHE_FENCE_TTL)
+    cache_tasks.add(
+        asyncio.create_task(publish_metrics_periodically(cache.client, settings.CACHE_METRICS_INTERVAL))
+    )
+
+    if settings.CACHE_LOCAL_ENABLED:
+        cache.local_cache = LocalCache(
+            max_entries=settings.CACHE_LOCAL_MAX_ENTRIES, max_bytes=settings.CACHE_LOCAL_MAX_BYTES
+        )
+    cache.invalidation_channel = settings.CACHE_INVALIDATION_CHANNEL
+    cache_tasks.add(asyncio.create_task(cache.listen_for_invalidations()))
+
+
+async def close_cache_backend() -> None:
+    await cancel_background_tasks(cache_tasks)
+    if cache.backend is not None:
+        await cache.backend.close()
+        cache.backend = None
+    if cache.client is not None:
+        await cache.client.aclose()
+        cache.client = None
+
+
+async def warm_cache(app: FastAPI) -> None:
+    paths = [path.strip() for path in settings.CACHE_WARMUP_PATHS.split(",") if path.strip()]
+    if not paths:
+        return
+
+    cache_warmer.warmer = CacheWarmer(app, paths, concurrency=settings.CACHE_WARMUP_CONCURRENCY)
+    cache_warmer.warmer.schedule()
+
+
+async def stop_cache_warmer() -> None:
+    if cache_warmer.warmer is not None:
+        await cache_warmer.warmer.close()
+        cache_warmer.warmer = None
+
+
+# -------------- rbac --------------
+async def load_rbac_snapshot() -> None:
+    async with local_session() as db:
+        await rbac.preload(db)
+
+
+# -------------- token blacklist --------------
+async def create_token_blacklist() -> None:
+    token_blacklist.bloom_capacity = settings.TOKEN_BLACKLIST_BLOOM_CAPACITY
+    token_blacklist.bloom_error_rate = settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE
+    token_blacklist.channel = settings.TOKEN_BLACKLIST_CHANNEL
+    token_blacklist.client = redis.Redis.from_url(settings.REDIS_TOKEN_BLACKLIST_URL)
+
+    async with local_session() as db:
+        await token_blacklist.rebuild(db, restore=True)
+
+    token_blacklist_tasks.add(asyncio.create_task(token_blacklist.listen_for_revocations()))
+    token_blacklist_tasks.add(
+        asyncio.create_task(token_blacklist.rebuild_periodically(settings.TOKEN_BLACKLIST_REBUILD_INTERVAL))
+    )
+    token_blacklist_tasks.add(
+        asyncio.create_task(token_blacklist.purge_periodically(settings.TOKEN_BLACKLIST_PURGE_INTERVAL))
+    )
+
 
+async def close_token_blacklist() -> None:
+    await cancel_background_tasks(token_blacklist_tasks)
+    token_blacklist.bloom = None
+    token_blacklist.pending_revocations.clear()
+    if token_blacklist.client is not None:
+        await token_blacklist.client.aclose()
+        token_blacklist.client = None
 
-async def close_redis_cache_pool() -> None:
-    await cache.client.aclose()  # type: ignore
+
+# -------------- rate limit --------------
+async def create_rate_limiter() -> None:
+    rate_limit.local_share = settings.RATE_LIMIT_LOCAL_SHARE
+    rate_limit.trusted_proxies = [
+        ipaddress.ip_network(proxy.strip(), strict=False)
+        for proxy in settings.RATE_LIMIT_TRUSTED_PROXIES.split(",")
+        if proxy.strip()
+    ]
+    rate_limit.client = redis.Redis.from_url(settings.REDIS_RATE_LIMIT_URL)
+
+
+async def close_rate_limiter() -> None:
+    rate_limit.local_counts.clear()
+    if rate_limit.client is not None:
+        await rate_limit.client.aclose()
+        rate_limit.client = None
+
+
+# -------------- password hashing --------------
+async def create_password_hashing_pool() -> None:
+    password_hashing.executor = ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix="password-hashing"
+    )
+
+
+async def close_password_hashing_pool() -> None:
+    if password_hashing.executor is not None:
+        password_hashing.executor.shutdown(wait=False, cancel_futures=True)
+        password_hashing.executor = None
 
 
 # -------------- application --------------
@@ -52,6 +213,9 @@ def lifespan_factory(
         | RedisCacheSettings
         | AppSettings
         | ClientSideCacheSettings       
+        | RedisTokenBlacklistSettings
+        | RedisRateLimiterSettings
+        | CryptSettings
         | EnvironmentSettings
     ),
     create_tables_on_start: bool = True,
@@ -66,12 +230,40 @@ def lifespan_factory(
             await create_tables()
 
         if isinstance(settings, RedisCacheSettings):
-            await create_redis_cache_pool()      
+            await create_cache_backend()
+
+        if isinstance(settings, DatabaseSettings):
+            await load_rbac_snapshot()
+
+        if isinstance(settings, RedisTokenBlacklistSettings):
+            await create_token_blacklist()
+
+        if isinstance(settings, CryptSettings):
+            await create_password_hashing_pool()
+
+        if isinstance(settings, RedisRateLimiterSettings):
+            await create_rate_limiter()
+
+        # warm-up requests go through the whole app, so everything they depend on must be set up first
+        if isinstance(settings, RedisCacheSettings):
+            await warm_cache(app)
 
         yield
 
         if isinstance(settings, RedisCacheSettings):
-            await close_redis_cache_pool()      
+            await stop_cache_warmer()
+
+        if isinstance(settings, RedisRateLimiterSettings):
+            await close_rate_limiter()
+
+        if isinstance(settings, CryptSettings):
+            await close_password_hashing_pool()
+
+        if isinstance(settings, RedisTokenBlacklistSettings):
+            await close_token_blacklist()
+
+        if isinstance(settings, RedisCacheSettings):
+            await close_cache_backend()
 
     return lifespan
 
@@ -84,6 +276,10 @@ def create_application(
         | RedisCacheSettings
         | AppSettings
         | ClientSideCacheSettings    
+        | CompressionSettings
+        | RedisTokenBlacklistSettings
+        | RedisRateLimiterSettings
+        | CryptSettings
         | EnvironmentSettings
     ),
     create_tables_on_start: bool = True,
@@ -104,9 +300,14 @@ def create_application(
         It determines the configuration applied:
 
         - AppSettings: Configures basic app metadata like name, description, contact, and license info.
-        - DatabaseSettings: Adds event handlers for initializing database tables during startup.
-        - RedisCacheSettings: Sets up event handlers for creating and closing a Redis cache pool.
+        - DatabaseSettings: Adds event handlers for initializing database tables and loading the RBAC snapshot during
+          startup.
+        - RedisCacheSettings: Sets up event handlers for creating and closing the cache backend.
         - ClientSideCacheSettings: Integrates middleware for client-side caching.        
+        - CompressionSettings: Integrates middleware compressing response bodies.
+        - RedisTokenBlacklistSettings: Sets up event handlers for loading and syncing the token blacklist filter.
+        - CryptSettings: Sets up event handlers for creating and closing the thread pool hashing passwords.
+        - RedisRateLimiterSettings: Sets up event handlers for creating and closing the rate limiter's Redis client.
         - EnvironmentSettings: Conditionally sets documentation URLs and integrates custom routes for API documentation
           based on the environment type.
 
@@ -145,6 +346,14 @@ def create_application(
     application = FastAPI(lifespan=lifespan, **kwargs)
     application.include_router(router)
 
+    if isinstance(settings, CompressionSettings):
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            encodings=[encoding.strip() for encoding in settings.COMPRESSION_ENCODINGS.split(",") if encoding.strip()],
+            streaming=settings.COMPRESSION_STREAMING,
+        )
+
     if isinstance(settings, ClientSideCacheSettings):
         application.add_middleware(ClientCacheMiddleware, max_age=settings.CLIENT_CACHE_MAX_AGE)
 
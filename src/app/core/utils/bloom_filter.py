@@ -0,0 +1,41 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """A set membership filter without false negatives, answering "maybe present" for a few absent items.
+
+    Parameters
+    ----------
+    capacity: int, optional
+        Number of items the filter is sized for. Defaults to 100,000.
+    error_rate: float, optional
+        False positive rate expected once `capacity` items have been added. Defaults to 0.001.
+
+    Note
+    ----
+        - Items cannot be removed; rebuild the filter to forget them. Beyond `capacity` items, the false
+          positive rate grows past `error_rate`.
+        - Bit positions are derived from a single blake2b digest with double hashing.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
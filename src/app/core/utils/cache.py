@@ -1,149 +1,312 @@
+import asyncio
 import functools
+import inspect
 import json
 import re
-from collections.abc import Callable
-from typing import Any
-
-from fastapi import Request, Response
+import string
+import struct
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable, Collection, Mapping
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, NamedTuple, get_args, get_origin
+
+from fastapi import HTTPException, Request, Response
+from fastapi.datastructures import DefaultPlaceholder
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
 from redis.asyncio import ConnectionPool, Redis
-
-from ..exceptions.cache_exceptions import CacheIdentificationInferenceError, InvalidRequestError, MissingClientError
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.database import local_session
+from ..exceptions.cache_exceptions import (
+    CacheIdentificationInferenceError,
+    CacheKeyTemplateError,
+    InvalidRequestError,
+    MissingClientError,
+)
+from ..logger import logging
+from . import cache_warmer
+from .cache_backends import CacheBackend
+from .cache_codecs import get_codec, get_codec_by_id
+from .cache_metrics import metrics
+from .circuit_breaker import CircuitBreaker
+from .etag import etag_matches, make_etag, variant_etag
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
+backend: CacheBackend | None = None
+local_cache: LocalCache | None = None
+invalidation_channel: str = "cache:invalidations"
+lock_timeout: float = 10.0
+lock_poll_interval: float = 0.05
+default_codec: str = "gzip"
+compression_threshold: int = 1024
+
+registered_prefixes: set[str] = set()
+namespace_generations: dict[str, int] = {}
+subscribed: bool = False
+circuit_breaker = CircuitBreaker()
+pending_invalidations: "deque[Invalidation]" = deque(maxlen=10000)
+_replay_lock = asyncio.Lock()
+_inflight: dict[str, asyncio.Future] = {}
+_refresh_tasks: set[asyncio.Task] = set()
+
+_ENTRY_FORMAT_VERSION = 1
+_ENTRY_HEADER = struct.Struct(">BBHI")
+
+
+class CachedResponse(NamedTuple):
+    """A fully rendered response as stored in the cache.
+
+    `variants` maps HTTP content codings to the body compressed with them, when the entry was stored
+    compressed with a codec that has one, so `CompressionMiddleware` can send those bytes as they are.
+    """
 
+    body: bytes
+    status_code: int
+    headers: dict[str, str]
+    variants: dict[str, bytes] | None = None
 
-def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
-    """Infer the resource ID from a dictionary of keyword arguments.
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in (self.variants or {}).values())
 
-    Parameters
-    ----------
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-    resource_id_type: Union[type, Tuple[type, ...]]
-        The expected type of the resource ID, which can be integer (int) or a string (str).
+    def to_response(self) -> Response:
+        return Response(content=self.body, status_code=self.status_code, headers=self.headers)
 
-    Returns
-    -------
-    Union[None, int, str]
-        The inferred resource ID. If it cannot be inferred or does not match the expected type, it returns None.
+
+def _encode_entry(entry: CachedResponse, codec_name: str | None = None) -> bytes:
+    """Encode a rendered response into the current cache entry format.
+
+    Layout: `<version:u8><codec id:u8><status:u16><meta length:u32><meta json><body>`, where the body is
+    compressed with the given codec (or the default one) once it reaches `compression_threshold` bytes.
+    """
+    codec = get_codec(codec_name or default_codec)
+    body = entry.body
+    if len(body) >= compression_threshold:
+        body = codec.compress(body)
+    else:
+        codec = get_codec_by_id(0)
+
+    meta = json.dumps(entry.headers).encode()
+    return _ENTRY_HEADER.pack(_ENTRY_FORMAT_VERSION, codec.id, entry.status_code, len(meta)) + meta + body
+
+
+def _decode_entry(data: bytes) -> CachedResponse | None:
+    """Decode a cache entry written by any known version of `_encode_entry`.
+
+    Returns None for entries written in an unknown (newer) format, which callers treat as a miss.
 
     Note
     ----
-        - When `resource_id_type` is `int`, the function looks for an argument with the key 'id'.
-        - When `resource_id_type` is `str`, it attempts to infer the resource ID as a string.
+        - Bare JSON documents, as stored by releases that cached the endpoint's return value, are decoded
+          as the body of a 200 response.
     """
-    resource_id: int | str | None = None
-    for arg_name, arg_value in kwargs.items():
-        if isinstance(arg_value, resource_id_type):
-            if (resource_id_type is int) and ("id" in arg_name):
-                resource_id = arg_value
+    if data[:1] in (b"{", b"["):
+        return CachedResponse(body=data, status_code=200, headers={"content-type": "application/json"})
 
-            elif (resource_id_type is int) and ("id" not in arg_name):
-                pass
+    if data[0] == _ENTRY_FORMAT_VERSION:
+        _, codec_id, status_code, meta_length = _ENTRY_HEADER.unpack_from(data)
+        offset = _ENTRY_HEADER.size
+        headers = json.loads(data[offset : offset + meta_length])
+        body = get_codec_by_id(codec_id).decompress(data[offset + meta_length :])
+        return CachedResponse(body=body, status_code=status_code, headers=headers, variants=_entry_variants(data))
 
-            elif resource_id_type is str:
-                resource_id = arg_value
+    return None
 
-    if resource_id is None:
-        raise CacheIdentificationInferenceError
 
-    return resource_id
+def _entry_variants(data: bytes) -> dict[str, bytes] | None:
+    """Return the compressed body of a current format entry, keyed by its HTTP content coding."""
+    _, codec_id, _, meta_length = _ENTRY_HEADER.unpack_from(data)
+    content_encoding = get_codec_by_id(codec_id).content_encoding
+    if content_encoding is None:
+        return None
+    return {content_encoding: data[_ENTRY_HEADER.size + meta_length :]}
 
 
-def _extract_data_inside_brackets(input_string: str) -> list[str]:
-    """Extract data inside curly brackets from a given string using regular expressions.
+async def _render_response(request: Request, result: Any) -> CachedResponse:
+    """Render an endpoint's return value to the bytes FastAPI would send for it.
+
+    The matched route's response model and response class are applied exactly once, so the rendered
+    body can be returned as-is on this and every subsequent cache hit. Successful responses get a strong
+    `ETag` computed from the body, which is then stored with it.
 
     Parameters
     ----------
-    input_string: str
-        The input string in which to find data enclosed within curly brackets.
+    request: Request
+        The incoming request, whose scope holds the matched route.
+    result: Any
+        The value returned by the endpoint.
 
     Returns
     -------
-    List[str]
-        A list of strings containing the data found inside the curly brackets within the input string.
+    CachedResponse
+        The rendered body, status code and headers.
+    """
+    if not isinstance(result, Response):
+        route = request.scope.get("route")
+        if isinstance(route, APIRoute):
+            content = await serialize_response(
+                field=route.response_field,
+                response_content=result,
+                include=route.response_model_include,
+                exclude=route.response_model_exclude,
+                by_alias=route.response_model_by_alias,
+                exclude_unset=route.response_model_exclude_unset,
+                exclude_defaults=route.response_model_exclude_defaults,
+                exclude_none=route.response_model_exclude_none,
+            )
+            response_class = route.response_class
+            if isinstance(response_class, DefaultPlaceholder):
+                response_class = response_class.value
+            result = response_class(content, status_code=route.status_code or 200)
+        else:
+            result = JSONResponse(jsonable_encoder(result))
+
+    headers = {name: value for name, value in result.headers.items() if name != "content-length"}
+    body = bytes(result.body)
+    if result.status_code == 200 and "etag" not in headers:
+        headers["etag"] = make_etag(body)
+    return CachedResponse(body=body, status_code=result.status_code, headers=headers)
+
+
+def _template_fields(template: str) -> list[str]:
+    """Return the names of the arguments referenced by a key template.
 
     Example
     -------
-    >>> _extract_data_inside_brackets("The {quick} brown {fox} jumps over the {lazy} dog.")
-    ['quick', 'fox', 'lazy']
+    >>> _template_fields("products:items_per_page_{items_per_page}:page")
+    ['items_per_page']
     """
-    data_inside_brackets = re.findall(r"{(.*?)}", input_string)
-    return data_inside_brackets
+    return [re.split(r"[.\[]", field)[0] for _, field, _, _ in string.Formatter().parse(template) if field]
 
 
-def _construct_data_dict(data_inside_brackets: list[str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Construct a dictionary based on data inside brackets and keyword arguments.
+def _compile_template(template: str, parameters: Collection[str]) -> Callable[[dict[str, Any]], str]:
+    """Validate a key template against the endpoint's parameters and return a function formatting it.
 
     Parameters
     ----------
-    data_inside_brackets: List[str]
-        A list of keys inside brackets.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    template: str
+        The template, e.g. "products:items_per_page_{items_per_page}:page".
+    parameters: Collection[str]
+        The names of the decorated endpoint's parameters.
 
     Returns
     -------
-    Dict[str, Any]: A dictionary with keys from data_inside_brackets and corresponding values from kwargs.
+    Callable[[Dict[str, Any]], str]
+        A function formatting the template with the endpoint's keyword arguments.
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If the template references a parameter the endpoint does not have.
     """
-    data_dict = {}
-    for key in data_inside_brackets:
-        data_dict[key] = kwargs[key]
-    return data_dict
+    fields = _template_fields(template)
+    missing = [field for field in fields if field not in parameters]
+    if missing:
+        raise CacheKeyTemplateError(f"Cache key template '{template}' references unknown parameters: {missing}.")
+
+    if not fields:
+        return lambda kwargs: template
+
+    return template.format_map
 
 
-def _format_prefix(prefix: str, kwargs: dict[str, Any]) -> str:
-    """Format a prefix using keyword arguments.
+def _infer_resource_id_name(
+    parameters: Mapping[str, inspect.Parameter], resource_id_type: type | tuple[type, ...]
+) -> str:
+    """Infer which endpoint parameter holds the resource ID from the parameters' annotations.
 
     Parameters
     ----------
-    prefix: str
-        The prefix template to be formatted.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    parameters: Mapping[str, inspect.Parameter]
+        The decorated endpoint's parameters.
+    resource_id_type: Union[type, Tuple[type, ...]]
+        The expected type of the resource ID, which can be integer (int) or a string (str).
 
     Returns
     -------
-    str: The formatted prefix.
+    str
+        The name of the parameter holding the resource ID.
+
+    Raises
+    ------
+    CacheIdentificationInferenceError
+        If no parameter matches.
+
+    Note
+    ----
+        - When `resource_id_type` is `int`, only parameters whose name contains 'id' are considered.
+        - When several parameters match, the last one wins.
     """
-    data_inside_brackets = _extract_data_inside_brackets(prefix)
-    data_dict = _construct_data_dict(data_inside_brackets, kwargs)
-    formatted_prefix = prefix.format(**data_dict)
-    return formatted_prefix
+    resource_id_name = None
+    for name, parameter in parameters.items():
+        annotation = parameter.annotation
+        if get_origin(annotation) is Annotated:
+            annotation = get_args(annotation)[0]
 
+        if not isinstance(annotation, type) or not issubclass(annotation, resource_id_type):
+            continue
 
-def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Format extra data based on provided templates and keyword arguments.
+        if resource_id_type is str or "id" in name:
+            resource_id_name = name
 
-    This function takes a dictionary of templates and their associated values and a dictionary of keyword arguments.
-    It formats the templates with the corresponding values from the keyword arguments and returns a dictionary
-    where keys are the formatted templates and values are the associated keyword argument values.
+    if resource_id_name is None:
+        raise CacheIdentificationInferenceError
+
+    return resource_id_name
+
+
+def _compile_key_builder(
+    parameters: Mapping[str, inspect.Parameter],
+    key_prefix: str,
+    resource_id_name: str | None,
+    resource_id_type: type | tuple[type, ...],
+) -> Callable[[dict[str, Any]], str]:
+    """Build, once per decorated endpoint, the function computing cache keys from its keyword arguments.
+
+    The endpoint signature and the key template are inspected at decoration time, so misconfigured keys fail
+    at import instead of on the first request, and each request only pays for a single string format.
 
     Parameters
     ----------
-    to_invalidate_extra: Dict[str, str]
-        A dictionary where keys are templates and values are the associated values.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    parameters: Mapping[str, inspect.Parameter]
+        The decorated endpoint's parameters.
+    key_prefix: str
+        The key prefix template.
+    resource_id_name: str | None
+        The name of the resource ID parameter. If None, it is inferred from the annotations.
+    resource_id_type: Union[type, Tuple[type, ...]]
+        The expected type of the resource ID, used only if `resource_id_name` is None.
 
     Returns
     -------
-        Dict[str, Any]: A dictionary where keys are formatted templates and values
-        are associated keyword argument values.
+    Callable[[Dict[str, Any]], str]
+        A function returning "{formatted key prefix}:{resource id}".
     """
-    formatted_extra = {}
-    for prefix, id_template in to_invalidate_extra.items():
-        formatted_prefix = _format_prefix(prefix, kwargs)
-        id = _extract_data_inside_brackets(id_template)[0]
-        formatted_extra[formatted_prefix] = kwargs[id]
+    if resource_id_name is None:
+        resource_id_name = _infer_resource_id_name(parameters, resource_id_type)
+    elif resource_id_name not in parameters:
+        raise CacheKeyTemplateError(f"Resource ID parameter '{resource_id_name}' not found for '{key_prefix}'.")
+
+    format_prefix = _compile_template(key_prefix, parameters)
+    name = resource_id_name
+
+    def build_key(kwargs: dict[str, Any]) -> str:
+        return f"{format_prefix(kwargs)}:{kwargs[name]}"
 
-    return formatted_extra
+    return build_key
 
 
 async def _delete_keys_by_pattern(pattern: str) -> None:
-    """Delete keys from Redis that match a given pattern using the SCAN command.
+    """Delete keys from the cache backend that match a given pattern, using the SCAN command on Redis.
 
     This function iteratively scans the Redis key space for keys that match a specific pattern
     and deletes them. It uses the SCAN command to efficiently find keys, which is more
@@ -171,14 +334,760 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     - Be cautious with patterns that could match a large number of keys, as deleting
       many keys simultaneously may impact the performance of the Redis server.
     """
-    if client is None:
+    if backend is None:
+        raise MissingClientError
+
+    await backend.delete_pattern(pattern)
+
+    if local_cache is not None:
+        local_cache.delete_pattern(pattern)
+
+
+def _evict_local(keys: list[str], patterns: list[str]) -> None:
+    """Evict keys and key patterns from the in-process cache tier, if it is enabled."""
+    if local_cache is None:
+        return
+
+    for key in keys:
+        local_cache.delete(key)
+    for pattern in patterns:
+        local_cache.delete_pattern(pattern)
+
+
+async def _namespace_generation(namespace: str) -> int:
+    """Return the current generation of a namespace.
+
+    With a broadcasting backend, it is read only the first time it is needed while this worker is
+    `subscribed` to the invalidation channel, and later changes reach it through that channel (see
+    `listen_for_invalidations`). Until the subscription is up, a change could be missed, so the backend is
+    asked every time, as are other backends, which are cheap to read locally.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    if not backend.broadcasts or not subscribed:
+        return await backend.get_counter(f"cache_ns:{namespace}")
+
+    generation = namespace_generations.get(namespace)
+    if generation is None:
+        generation = await backend.get_counter(f"cache_ns:{namespace}")
+        # the subscription may have dropped while reading, and a newer generation may have been received
+        if subscribed:
+            _update_generations({namespace: generation})
+
+    return generation
+
+
+async def _bump_namespace(namespace: str) -> int:
+    """Invalidate every entry of a namespace in O(1) by incrementing its generation.
+
+    Entries of older generations are no longer looked up and age out through their TTL.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    generation = await backend.incr(f"cache_ns:{namespace}")
+    if subscribed:
+        _update_generations({namespace: generation})
+    return generation
+
+
+def _update_generations(generations: dict[str, int]) -> None:
+    for namespace, generation in generations.items():
+        namespace_generations[namespace] = max(generation, namespace_generations.get(namespace, 0))
+
+
+async def _publish_invalidation(
+    keys: list[str], patterns: list[str] | None = None, generations: dict[str, int] | None = None
+) -> None:
+    """Evict keys locally and broadcast the invalidation to every other worker, if the backend broadcasts.
+
+    Parameters
+    ----------
+    keys: List[str]
+        Exact cache keys that were invalidated.
+    patterns: List[str] | None, optional
+        Glob-style patterns of cache keys that were invalidated.
+    generations: Dict[str, int] | None, optional
+        New generations of the namespaces that were invalidated.
+
+    Note
+    ----
+        - Keys and patterns are only published when the in-process tier is enabled, since otherwise no
+          worker holds local copies. Namespace generations are always published.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    patterns = patterns or []
+    generations = generations or {}
+    if not backend.broadcasts or (local_cache is None and not generations):
+        return
+
+    _evict_local(keys, patterns)
+    message = {"keys": keys, "patterns": patterns, "generations": generations}
+    await backend.publish(invalidation_channel, json.dumps(message))
+
+
+class Invalidation(NamedTuple):
+    """Cache entries to invalidate, kept for replay while the backend is unavailable."""
+
+    keys: list[str]
+    patterns: list[str]
+    tags: list[str]
+    namespaces: list[str]
+
+
+def _record_backend_failure(exc: Exception) -> None:
+    logger.warning(f"Cache backend unavailable, bypassing the cache: {exc}")
+    circuit_breaker.record_failure()
+
+
+async def _apply_invalidation(invalidation: Invalidation, key_prefix: str | None = None) -> list[str]:
+    """Delete the entries of an invalidation from the backend and broadcast it to every worker.
+
+    Returns every cache key that was invalidated.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    invalidated_keys = list(invalidation.keys)
+    await backend.delete(invalidated_keys)
+
+    for pattern in invalidation.patterns:
+        start = time.perf_counter()
+        await _delete_keys_by_pattern(pattern)
+        if key_prefix is not None:
+            metrics.observe(key_prefix, "pattern_delete", time.perf_counter() - start)
+
+    for tag in invalidation.tags:
+        invalidated_keys.extend(await backend.invalidate_tag(f"cache_tag:{tag}"))
+
+    generations = {namespace: await _bump_namespace(namespace) for namespace in invalidation.namespaces}
+    await _publish_invalidation(invalidated_keys, invalidation.patterns, generations)
+    return invalidated_keys
+
+
+async def _replay_invalidations() -> None:
+    async with _replay_lock:
+        while pending_invalidations:
+            await _apply_invalidation(pending_invalidations[0])
+            pending_invalidations.popleft()
+
+
+async def _backend_available() -> bool:
+    """Return whether the cache can be used, probing the backend when the circuit breaker allows it.
+
+    The circuit breaker opens after consecutive backend failures (every successful call resets the count),
+    after which requests bypass the cache until a single probe succeeds. The probe first replays the
+    invalidations queued in the meantime, so entries made stale by writes during the outage are never served.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    if circuit_breaker.state == "closed" and not pending_invalidations:
+        return True
+
+    if not circuit_breaker.allow_request():
+        return False
+
+    try:
+        await backend.ping()
+        await _replay_invalidations()
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return False
+    finally:
+        # a cancelled probe must not keep the cache bypassed for good
+        circuit_breaker.probing = False
+
+    circuit_breaker.record_success()
+    return True
+
+
+async def _invalidate_or_queue(invalidation: Invalidation, key_prefix: str | None = None) -> list[str]:
+    """Apply an invalidation, or queue it for replay if the backend is unavailable.
+
+    Returns every cache key that was invalidated, or the invalidation's own keys if it was queued.
+    """
+    if backend is None:
         raise MissingClientError
 
-    cursor = -1
-    while cursor != 0:
-        cursor, keys = await client.scan(cursor, match=pattern, count=100)
-        if keys:
-            await client.delete(*keys)
+    if await _backend_available():
+        try:
+            invalidated_keys = await _apply_invalidation(invalidation, key_prefix)
+        except backend.errors as exc:
+            _record_backend_failure(exc)
+        else:
+            circuit_breaker.record_success()
+            return invalidated_keys
+
+    if len(pending_invalidations) == pending_invalidations.maxlen:
+        logger.error("Too many cache invalidations queued while the backend is unavailable, dropping the oldest")
+    pending_invalidations.append(invalidation)
+    return list(invalidation.keys)
+
+
+async def invalidate(
+    keys: list[str], tags: list[str] | None = None, namespaces: list[str] | None = None
+) -> list[str]:
+    """Invalidate cache entries outside of the `cache` decorator.
+
+    Entries are deleted from the backend and evicted from the in-memory tier of every worker. This is meant for
+    writes whose cache key is only known after the fact, e.g. clearing a negative entry once a resource
+    has been created. If the backend is unavailable, the invalidation is queued and replayed once it recovers.
+
+    Parameters
+    ----------
+    keys: List[str]
+        Exact cache keys to delete.
+    tags: List[str] | None, optional
+        Tags whose entries should all be deleted.
+    namespaces: List[str] | None, optional
+        Namespaces whose generation should be bumped.
+
+    Returns
+    -------
+    List[str]
+        Every cache key that was invalidated.
+    """
+    invalidation = Invalidation(keys=list(keys), patterns=[], tags=tags or [], namespaces=namespaces or [])
+    return await _invalidate_or_queue(invalidation)
+
+
+async def namespace_generation(namespace: str) -> int | None:
+    """Return the current generation of a namespace, or None if no backend is available.
+
+    This is meant for callers keeping their own copy of data versioned by a namespace, which they reload
+    when its generation changes; writers bump it with `invalidate([], namespaces=[namespace])`. With a
+    broadcasting backend, the generation is known in-process while this worker is subscribed to
+    invalidations, so checking it costs no network call.
+    """
+    if backend is None or not await _backend_available():
+        return None
+
+    try:
+        generation = await _namespace_generation(namespace)
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return None
+
+    circuit_breaker.record_success()
+    return generation
+
+
+async def get_or_load(
+    key: str, load: Callable[[], Awaitable[Any]], expiration: int, local_expiration: int | None = None
+) -> Any:
+    """Return a JSON-serializable value cached under `key`, calling `load` and caching its result on a miss.
+
+    This is meant for values other than responses, e.g. the user resolved from a token. Fills are fenced
+    like those of the `cache` decorator, so a value loaded before a concurrent `invalidate([key])` is not
+    stored. None is never cached. Without a backend, or while it is unavailable, `load` is called directly.
+
+    Parameters
+    ----------
+    key: str
+        The cache key.
+    load: Callable[[], Awaitable[Any]]
+        Coroutine function returning the value, called on a miss.
+    expiration: int
+        Seconds the value is kept in the backend.
+    local_expiration: int | None, optional
+        Seconds the value is kept in the in-process tier, if it is enabled. Not kept there if None.
+
+    Returns
+    -------
+    Any
+        The cached or loaded value.
+    """
+    if backend is None or not await _backend_available():
+        return await load()
+
+    use_local = local_cache is not None and local_expiration is not None
+    if use_local:
+        value = local_cache.get(key)  # type: ignore[union-attr]
+        if value is not None:
+            return value
+
+    try:
+        data = await backend.get(key)
+        fences = {} if data is not None else {key: (await backend.read_fences([key]))[0]}
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return await load()
+
+    circuit_breaker.record_success()
+    if data is not None:
+        value = json.loads(data)
+        if use_local:
+            local_cache.set(key, value, len(data), local_expiration)  # type: ignore
+        return value
+
+    value = await load()
+    if value is None:
+        return None
+
+    encoded = json.dumps(value).encode()
+    try:
+        stored = await backend.fenced_set(key, encoded, expiration, fences, [])
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return value
+
+    if stored and use_local:
+        local_cache.set(key, value, len(encoded), local_expiration)  # type: ignore
+    return value
+
+
+def _clear_local_state() -> None:
+    if local_cache is not None:
+        local_cache.clear()
+    namespace_generations.clear()
+
+
+async def listen_for_invalidations() -> None:
+    """Subscribe to the invalidation channel, evicting matching local entries and tracking namespace generations.
+
+    This coroutine runs for the lifetime of the application as a background task. `subscribed` is only set
+    while the subscription is up, so namespace generations are read from the backend until it is. Once
+    subscribed, the local tier and the known generations are cleared, since messages may have been missed
+    before. If the subscription drops, they are cleared as well and the subscription is retried.
+    """
+    global subscribed
+
+    if backend is None:
+        raise MissingClientError
+
+    if not backend.broadcasts:
+        return
+
+    while True:
+        try:
+            async for message in backend.subscribe(invalidation_channel):
+                if message is None:
+                    _clear_local_state()
+                    subscribed = True
+                    continue
+
+                data = json.loads(message)
+                _evict_local(data.get("keys", []), data.get("patterns", []))
+                _update_generations(data.get("generations", {}))
+
+        except asyncio.CancelledError:
+            subscribed = False
+            raise
+
+        except (RedisError, OSError) as exc:
+            subscribed = False
+            logger.warning(f"Cache invalidation subscription lost, retrying: {exc}")
+            _clear_local_state()
+            await asyncio.sleep(1)
+
+
+async def _compute_with_lock(
+    cache_key: str, compute: Callable[[], Awaitable[Any]], read_cached: Callable[[], Awaitable[Any | None]]
+) -> Any:
+    """Recompute a cache entry while holding a short lock, so only one worker hits the database.
+
+    The worker that acquires `lock:{cache_key}` computes and stores the value. The other workers poll
+    the cache key until the value appears, the lock is released without a value (e.g. the endpoint raised),
+    or `lock_timeout` elapses; in the last two cases they compute the value themselves. A backend failure
+    while locking or polling also falls back to computing, and one while unlocking is only recorded, so
+    backend errors never reach the caller.
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key being recomputed.
+    compute: Callable[[], Awaitable[Any]]
+        Coroutine function that runs the endpoint and stores its result in the cache.
+    read_cached: Callable[[], Awaitable[Any | None]]
+        Coroutine function that returns the cached value, or None if it is missing.
+
+    Returns
+    -------
+    Any
+        The freshly computed or concurrently filled value.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    lock_key = f"lock:{cache_key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = await backend.acquire_lock(lock_key, token, lock_timeout)
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return await compute()
+
+    if acquired:
+        try:
+            return await compute()
+        finally:
+            try:
+                await backend.release_lock(lock_key, token)
+            except backend.errors as exc:
+                _record_backend_failure(exc)
+
+    deadline = time.monotonic() + lock_timeout
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(lock_poll_interval)
+            cached = await read_cached()
+            if cached is not None:
+                return cached
+
+            if not await backend.exists(lock_key):
+                break
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+
+    return await compute()
+
+
+async def _single_flight(
+    cache_key: str, compute: Callable[[], Awaitable[Any]], read_cached: Callable[[], Awaitable[Any | None]]
+) -> Any:
+    """Coalesce concurrent cache misses for the same key into a single computation.
+
+    Within a worker, the first caller registers a future in `_inflight` and every concurrent caller for the
+    same key awaits it. Across workers, the first caller goes through `_compute_with_lock`.
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key that missed.
+    compute: Callable[[], Awaitable[Any]]
+        Coroutine function that runs the endpoint and stores its result in the cache.
+    read_cached: Callable[[], Awaitable[Any | None]]
+        Coroutine function that returns the cached value, or None if it is missing.
+
+    Returns
+    -------
+    Any
+        The value computed by whichever caller led the flight. Exceptions raised by the leader are
+        re-raised to every follower.
+    """
+    inflight = _inflight.get(cache_key)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            return await compute()
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await _compute_with_lock(cache_key, compute, read_cached)
+
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()  # mark as retrieved when there are no followers
+        raise
+
+    else:
+        future.set_result(result)
+        return result
+
+    finally:
+        _inflight.pop(cache_key, None)
+
+
+@asynccontextmanager
+async def _detached_kwargs(kwargs: dict[str, Any]) -> AsyncGenerator[dict[str, Any], None]:
+    """Copy endpoint keyword arguments, replacing request-scoped database sessions with fresh ones.
+
+    Background refreshes run after the response is sent, when the request's own session has been closed.
+    """
+    sessions = {name: local_session() for name, value in kwargs.items() if isinstance(value, AsyncSession)}
+    try:
+        yield {**kwargs, **sessions}
+    finally:
+        for session in sessions.values():
+            await session.close()
+
+
+async def _refresh(cache_key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+    """Recompute a stale cache entry in the background, at most once across all workers.
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key being refreshed.
+    compute: Callable[[], Awaitable[Any]]
+        Coroutine function that runs the endpoint and stores its result in the cache.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    lock_key = f"lock:{cache_key}"
+    token = uuid.uuid4().hex
+    try:
+        if await backend.acquire_lock(lock_key, token, lock_timeout):
+            try:
+                future.set_result(await compute())
+            finally:
+                await backend.release_lock(lock_key, token)
+
+    except Exception as exc:
+        logger.warning(f"Background refresh of cache key {cache_key} failed: {exc}")
+
+    finally:
+        if not future.done():
+            future.cancel()
+        _inflight.pop(cache_key, None)
+
+
+def _schedule_refresh(cache_key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+    """Start a background refresh of `cache_key` unless one is already running in this worker."""
+    if cache_key in _inflight:
+        return
+
+    task = asyncio.create_task(_refresh(cache_key, compute))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+class _CacheConfig(NamedTuple):
+    """The arguments of a `cache` decorator, with its templates compiled against the endpoint's signature."""
+
+    func: Callable
+    key_prefix: str
+    build_key: Callable[[dict[str, Any]], str]
+    expiration: int
+    local_expiration: int | None
+    stale_ttl: int | None
+    negative_expiration: int | None
+    codec: str | None
+    rewarm: bool
+    format_namespace: Callable[[dict[str, Any]], str] | None
+    format_tags: list[Callable[[dict[str, Any]], str]]
+    format_tags_to_invalidate: list[Callable[[dict[str, Any]], str]]
+    format_namespaces_to_invalidate: list[Callable[[dict[str, Any]], str]]
+    format_patterns: list[Callable[[dict[str, Any]], str]]
+    format_extra: list[tuple[Callable[[dict[str, Any]], str], Callable[[dict[str, Any]], str]]]
+
+    invalidates: bool
+
+    @property
+    def use_local(self) -> bool:
+        return local_cache is not None and self.local_expiration is not None
+
+    def local_ttl(self, status_code: int) -> int | None:
+        """Seconds an entry with `status_code` is kept in the in-memory tier, which must be in use."""
+        if status_code == 404 and self.negative_expiration is not None:
+            return min(self.local_expiration, self.negative_expiration)  # type: ignore[type-var]
+        return self.local_expiration
+
+
+async def _read_entry(
+    config: _CacheConfig,
+    cache_key: str,
+    refresh: Callable[[], Awaitable[CachedResponse]],
+    record_metrics: bool = False,
+) -> CachedResponse | None:
+    """Return the entry cached under `cache_key`, from the in-memory tier if possible, or None on a miss.
+
+    A stale entry is returned as it is, and `refresh` is scheduled in the background.
+    """
+    start = time.perf_counter()
+    if config.use_local:
+        local_data = local_cache.get(cache_key)  # type: ignore[union-attr]
+        if local_data is not None:
+            if record_metrics:
+                metrics.increment(config.key_prefix, "hit_local")
+                metrics.observe(config.key_prefix, "lookup", time.perf_counter() - start)
+            return local_data
+
+    if config.stale_ttl is None:
+        cached_data = await backend.get(cache_key)  # type: ignore[union-attr]
+        is_stale = False
+    else:
+        cached_data, ttl_ms = await backend.get_with_ttl(cache_key)  # type: ignore[union-attr]
+        is_stale = 0 <= ttl_ms <= config.stale_ttl * 1000
+
+    entry = _decode_entry(cached_data) if cached_data else None
+    if entry is None:
+        return None
+
+    is_stale = is_stale and entry.status_code != 404
+    if is_stale:
+        _schedule_refresh(cache_key, refresh)
+    elif config.use_local:
+        local_cache.set(cache_key, entry, entry.size, config.local_ttl(entry.status_code))  # type: ignore
+
+    if record_metrics:
+        metrics.increment(config.key_prefix, "stale_hit" if is_stale else "hit")
+        metrics.observe(config.key_prefix, "lookup", time.perf_counter() - start)
+    return entry
+
+
+async def _call_endpoint(
+    config: _CacheConfig, request: Request, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> tuple[Any, int]:
+    """Call the endpoint, returning its result and the seconds it should be cached for.
+
+    With negative caching enabled, a 404 raised by the endpoint is turned into a response cached for
+    `negative_expiration` seconds.
+    """
+    try:
+        result = await config.func(request, *args, **kwargs)
+    except HTTPException as exc:
+        if config.negative_expiration is None or exc.status_code != 404:
+            raise
+
+        metrics.increment(config.key_prefix, "negative_fill")
+        return JSONResponse({"detail": exc.detail}, status_code=404, headers=exc.headers), config.negative_expiration
+
+    return result, config.expiration + (config.stale_ttl or 0)
+
+
+async def _fill_entry(
+    config: _CacheConfig, request: Request, args: tuple[Any, ...], kwargs: dict[str, Any], cache_key: str
+) -> CachedResponse:
+    """Call the endpoint and store its rendered response under `cache_key`, unless a fence moved meanwhile.
+
+    Backend errors are recorded rather than raised, so the endpoint is called exactly once; if the fences
+    cannot be read, the response is not stored.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    start = time.perf_counter()
+    tag_keys = [f"cache_tag:{format_tag(kwargs)}" for format_tag in config.format_tags]
+    fenced_keys = [cache_key, *tag_keys]
+    try:
+        fences: dict[str, int] | None = dict(zip(fenced_keys, await backend.read_fences(fenced_keys)))
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        fences = None
+    result, ttl = await _call_endpoint(config, request, args, kwargs)
+
+    entry = await _render_response(request, result)
+    if entry.status_code == 404:
+        tag_keys = []
+    encoded = _encode_entry(entry, config.codec)
+    entry = entry._replace(variants=_entry_variants(encoded))
+    if fences is None:
+        return entry
+
+    try:
+        stored = await backend.fenced_set(cache_key, encoded, ttl, fences, tag_keys)
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        return entry
+
+    if not stored:
+        metrics.increment(config.key_prefix, "fill_discarded")
+        return entry
+
+    if config.use_local:
+        local_cache.set(cache_key, entry, entry.size, config.local_ttl(entry.status_code))  # type: ignore
+
+    metrics.increment(config.key_prefix, "fill")
+    metrics.observe(config.key_prefix, "fill", time.perf_counter() - start)
+    return entry
+
+
+async def _refresh_entry(
+    config: _CacheConfig, request: Request, args: tuple[Any, ...], kwargs: dict[str, Any], cache_key: str
+) -> CachedResponse:
+    """Fill `cache_key` again once the response is sent, with fresh database sessions."""
+    async with _detached_kwargs(kwargs) as refresh_kwargs:
+        return await _fill_entry(config, request, args, refresh_kwargs, cache_key)
+
+
+def _not_modified(config: _CacheConfig, request: Request, cached: CachedResponse) -> Response | None:
+    """Return a 304 if the request's `If-None-Match` matches the entry or one of its compressed variants.
+
+    The 304 carries the `Vary` header the 200 would have, including the "Accept-Encoding" that
+    `CompressionMiddleware` adds to entries with variants, so shared caches key both the same way.
+    """
+    etag = cached.headers.get("etag")
+    if cached.status_code != 200 or etag is None:
+        return None
+
+    if_none_match = request.headers.get("if-none-match")
+    for candidate in [etag, *(variant_etag(etag, encoding) for encoding in cached.variants or {})]:
+        if etag_matches(if_none_match, candidate):
+            metrics.increment(config.key_prefix, "not_modified")
+            response = Response(status_code=304, headers={"etag": candidate})
+            if "vary" in cached.headers:
+                response.headers["Vary"] = cached.headers["vary"]
+            if cached.variants:
+                response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+    if cached.variants:
+        request.state.compressed_variants = (etag, cached.variants)
+    return None
+
+
+async def _cached_response(
+    config: _CacheConfig, request: Request, args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> Response:
+    """Answer a GET request from the cache, calling the endpoint and filling the cache on a miss.
+
+    If the lookup fails, the endpoint is called without the cache. Past the lookup, backend errors are
+    handled where they occur, so the endpoint is never called twice.
+    """
+    if backend is None:
+        raise MissingClientError
+
+    resource_key = cache_key = config.build_key(kwargs)
+    try:
+        if config.format_namespace is not None:
+            formatted_namespace = config.format_namespace(kwargs)
+            cache_key = f"{cache_key}@{formatted_namespace}:{await _namespace_generation(formatted_namespace)}"
+
+        refresh = functools.partial(_refresh_entry, config, request, args, kwargs, cache_key)
+        read_cached = functools.partial(_read_entry, config, cache_key, refresh)
+        cached = await read_cached(record_metrics=True)
+    except backend.errors as exc:
+        _record_backend_failure(exc)
+        metrics.increment(config.key_prefix, "bypass")
+        return await config.func(request, *args, **kwargs)
+
+    circuit_breaker.record_success()
+    metrics.hot_keys.record(resource_key, hit=cached is not None)
+    if cached is None:
+        metrics.increment(config.key_prefix, "miss")
+        compute = functools.partial(_fill_entry, config, request, args, kwargs, cache_key)
+        cached = await _single_flight(cache_key, compute, read_cached)
+
+    not_modified = _not_modified(config, request, cached)
+    return not_modified if not_modified is not None else cached.to_response()
+
+
+async def _invalidate_after_write(config: _CacheConfig, kwargs: dict[str, Any]) -> None:
+    """Invalidate the entries a call with a method other than GET made stale, and rewarm if configured."""
+    invalidation = Invalidation(
+        keys=[config.build_key(kwargs)] + [f"{prefix(kwargs)}:{id_(kwargs)}" for prefix, id_ in config.format_extra],
+        patterns=[format_pattern(kwargs) + "*" for format_pattern in config.format_patterns],
+        tags=[format_tag(kwargs) for format_tag in config.format_tags_to_invalidate],
+        namespaces=[format_ns(kwargs) for format_ns in config.format_namespaces_to_invalidate],
+    )
+    if config.format_namespace is not None:
+        # the key embeds the namespace generation, which may be unknown while the backend is down
+        invalidation.namespaces.append(config.format_namespace(kwargs))
+
+    invalidated_keys = await _invalidate_or_queue(invalidation, config.key_prefix)
+    metrics.increment(
+        config.key_prefix,
+        "invalidation",
+        len(invalidated_keys) + len(invalidation.patterns) + len(invalidation.namespaces),
+    )
+    if config.rewarm and cache_warmer.warmer is not None:
+        cache_warmer.warmer.schedule()
 
 
 def cache(
@@ -188,6 +1097,15 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    local_expiration: int | None = None,
+    stale_ttl: int | None = None,
+    tags: list[str] | None = None,
+    tags_to_invalidate: list[str] | None = None,
+    codec: str | None = None,
+    rewarm: bool = False,
+    negative_expiration: int | None = None,
+    namespace: str | None = None,
+    namespaces_to_invalidate: list[str] | None = None,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -213,6 +1131,33 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    local_expiration: int | None, optional
+        The expiration time in seconds for copies kept in the per-worker in-memory tier. If None (default),
+        or if the in-memory tier is disabled in settings, every lookup goes to Redis.
+    stale_ttl: int | None, optional
+        Enables stale-while-revalidate. Entries are kept for `expiration + stale_ttl` seconds; once older
+        than `expiration`, callers get the stale value immediately while one background task refreshes it.
+    tags: List[str] | None, optional
+        Tags (which may be templates, e.g. "category:{category_id}") the cached entry is registered under.
+    tags_to_invalidate: List[str] | None, optional
+        Tags (which may be templates) whose entries are all invalidated when the decorated function is called
+        with a method other than GET. Prefer this over `pattern_to_invalidate_extra`, which scans the keyspace.
+    codec: str | None, optional
+        The name of the codec used to compress large entries (see `cache_codecs`). Defaults to the codec
+        configured in settings.
+    rewarm: bool, optional
+        If True, the configured warm-up paths are repopulated in the background after the decorated function
+        invalidates entries with a method other than GET. Defaults to False.
+    negative_expiration: int | None, optional
+        If set, a 404 raised by the decorated GET endpoint is cached for this many seconds and replayed to
+        later callers. Endpoints creating the resource must clear the entry, e.g. with `invalidate`.
+    namespace: str | None, optional
+        A namespace (which may be a template) whose current generation is embedded in the cache key, as
+        "{key}@{namespace}:{generation}". Methods other than GET invalidate the whole namespace.
+    namespaces_to_invalidate: List[str] | None, optional
+        Namespaces (which may be templates) invalidated when the decorated function is called with a method
+        other than GET. This costs a single INCR regardless of the number of entries; the orphaned entries
+        expire through their TTL. Prefer it for collection endpoints.
 
     Returns
     -------
@@ -277,57 +1222,92 @@ def cache(
 
     Note
     ----
-    - resource_id_type is used only if resource_id is not passed.
+    - resource_id_type is used only if resource_id is not passed. The resource ID parameter is then inferred
+      from the endpoint's type annotations.
+    - Key templates are checked against the endpoint signature when the decorator is applied, so an unknown
+      parameter raises `CacheKeyTemplateError` (or `CacheIdentificationInferenceError`) at import time.
     - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
     - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
       consider the potential impact on Redis performance.
+    - Invalidations are broadcast through Redis pub/sub, so in-memory copies are evicted on every worker.
+      Keep `local_expiration` short: it bounds staleness if an invalidation message is lost.
+    - Concurrent misses for the same key are coalesced: one caller per worker runs the endpoint, and a short
+      Redis lock (`lock:{cache_key}`) lets only one worker recompute while the others wait for the value.
+    - GET responses are rendered once through the route's response model and cached as final bytes plus
+      status and headers. Hits are returned as a `Response` without decoding or re-validating the payload.
+    - Cached responses carry a strong `ETag`. A request whose `If-None-Match` matches the cached entry gets
+      a 304 without calling the endpoint.
+    - Entries stored compressed with a codec matching an HTTP content coding (gzip, deflate, br, zstd) are
+      handed to `CompressionMiddleware`, which sends the stored bytes instead of compressing the body again.
+    - Background refreshes call the endpoint again after the response is sent. Any `AsyncSession` argument
+      is replaced by a fresh session for the duration of the refresh.
+    - Fills are fenced: invalidating a key or a tag bumps a counter (`fence:{key}`), and a fill is only
+      stored if the counters it read before calling the endpoint are unchanged, atomically in the backend.
+      A read racing a write therefore never repopulates the cache with the old value, which makes long
+      expirations safe. Namespaced keys need no fence since a bump changes the key itself. Pattern
+      invalidations (`pattern_to_invalidate_extra`) are not fenced.
+    - Entries are stored in the configured `backend` (Redis, a local SQLite file or process memory, see
+      `cache_backends`). The in-memory tier and the invalidation broadcasts are only used with Redis.
+    - Lookups are counted per key (without the namespace generation) in a fixed-size sketch, and the hottest
+      keys are published with the other cache metrics.
+    - If the backend fails, the endpoint is called directly. After repeated failures a circuit breaker skips
+      the backend altogether, and invalidations are queued until a probe finds it healthy again; they are
+      replayed before anything is read from the cache.
     """
 
+    if codec is not None:
+        get_codec(codec)
+    registered_prefixes.add(key_prefix)
+    extra = to_invalidate_extra or {}
+    invalidates = (
+        to_invalidate_extra is not None
+        or pattern_to_invalidate_extra is not None
+        or tags_to_invalidate is not None
+        or namespaces_to_invalidate is not None
+    )
+
     def wrapper(func: Callable) -> Callable:
+        parameters = inspect.signature(func).parameters
+
+        def compile_all(templates: list[str] | None) -> list[Callable[[dict[str, Any]], str]]:
+            return [_compile_template(template, parameters) for template in templates or []]
+
+        config = _CacheConfig(
+            func=func,
+            key_prefix=key_prefix,
+            build_key=_compile_key_builder(parameters, key_prefix, resource_id_name, resource_id_type),
+            expiration=expiration,
+            local_expiration=local_expiration,
+            stale_ttl=stale_ttl,
+            negative_expiration=negative_expiration,
+            codec=codec,
+            rewarm=rewarm,
+            format_namespace=_compile_template(namespace, parameters) if namespace is not None else None,
+            format_tags=compile_all(tags),
+            format_tags_to_invalidate=compile_all(tags_to_invalidate),
+            format_namespaces_to_invalidate=compile_all(namespaces_to_invalidate),
+            format_patterns=compile_all(pattern_to_invalidate_extra),
+            format_extra=list(zip(compile_all(list(extra)), compile_all(list(extra.values())))),
+            invalidates=invalidates,
+        )
+
         @functools.wraps(func)
-        async def inner(request: Request, *args: Any, **kwargs: Any) -> Response:
-            if client is None:
+        async def inner(request: Request, *args: Any, **kwargs: Any) -> Any:
+            if backend is None:
                 raise MissingClientError
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
-            else:
-                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
-
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
             if request.method == "GET":
-                if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+                if config.invalidates:
                     raise InvalidRequestError
 
-                cached_data = await client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data.decode())
-
-            result = await func(request, *args, **kwargs)
-
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
-
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
+                if await _backend_available():
+                    return await _cached_response(config, request, args, kwargs)
 
-                serialized_data = json.loads(serialized_data)
-
-            else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
+                metrics.increment(key_prefix, "bypass")
+                return await func(request, *args, **kwargs)
 
+            result = await func(request, *args, **kwargs)
+            await _invalidate_after_write(config, kwargs)
             return result
 
         return inner
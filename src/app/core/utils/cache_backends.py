@@ -0,0 +1,579 @@
+import asyncio
+import fnmatch
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Mapping
+from typing import Any, TypeVar
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .local_cache import LocalCache
+
+T = TypeVar("T")
+
+_FENCED_SET_SCRIPT = """
+local fences = tonumber(ARGV[3])
+for i = 1, fences do
+    if (redis.call("get", KEYS[i + 1]) or "0") ~= ARGV[i + 3] then
+        return 0
+    end
+end
+redis.call("set", KEYS[1], ARGV[1], "EX", ARGV[2])
+for i = fences + 2, #KEYS do
+    redis.call("sadd", KEYS[i], KEYS[1])
+    if redis.call("ttl", KEYS[i]) < tonumber(ARGV[2]) then
+        redis.call("expire", KEYS[i], ARGV[2])
+    end
+end
+return 1
+"""
+
+_FENCED_DELETE_SCRIPT = """
+local count = tonumber(ARGV[1])
+for i = 1, count do
+    redis.call("unlink", KEYS[i])
+    redis.call("incr", KEYS[count + i])
+    redis.call("expire", KEYS[count + i], ARGV[2])
+end
+return count
+"""
+
+_TAG_INVALIDATE_SCRIPT = """
+local count = tonumber(ARGV[2])
+local expected = {}
+for i = 3, count + 2 do
+    expected[KEYS[i]] = true
+end
+local members = redis.call("smembers", KEYS[1])
+for _, key in ipairs(members) do
+    if not expected[key] then
+        return {0, members}
+    end
+end
+for i = 3, count + 2 do
+    redis.call("unlink", KEYS[i])
+    redis.call("incr", KEYS[count + i])
+    redis.call("expire", KEYS[count + i], ARGV[1])
+end
+redis.call("unlink", KEYS[1])
+redis.call("incr", KEYS[2])
+redis.call("expire", KEYS[2], ARGV[1])
+return {1, members}
+"""
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def fence_key(key: str) -> str:
+    return f"fence:{key}"
+
+
+class CacheBackend(ABC):
+    """Base class for the stores behind the `cache` decorator.
+
+    Every operation the decorator needs is expressed here, so it works the same on a shared Redis, on a
+    file shared by the workers of a single node, or within a single process.
+
+    Attributes
+    ----------
+    name: str
+        The name used to pick the backend in settings.
+    broadcasts: bool
+        Whether `publish` reaches the other workers. Backends that do not broadcast are either private to
+        one process or read shared state on every call, so workers never need to be notified.
+    fence_ttl: int
+        Seconds a fence is kept after an invalidation. It must exceed the slowest endpoint call.
+    errors: Tuple[type, ...]
+        The exceptions raised when the store is unavailable, which the `cache` decorator degrades on.
+
+    Note
+    ----
+        - Fences are counters (`fence:{key}`) bumped whenever a key or tag is invalidated. A fill is only
+          stored if the fences it read before calling the endpoint are unchanged, atomically.
+    """
+
+    name: str = ""
+    broadcasts: bool = False
+    errors: tuple[type[Exception], ...] = ()
+
+    def __init__(self, fence_ttl: int = 3600) -> None:
+        self.fence_ttl = fence_ttl
+
+    async def ping(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, int]:
+        """Return the value of a key along with its remaining time to live in milliseconds (negative if none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def read_fences(self, keys: list[str]) -> list[int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fenced_set(
+        self, key: str, value: bytes, ttl: int, fences: Mapping[str, int], tag_keys: list[str]
+    ) -> bool:
+        """Store a value and register it under tag sets, unless one of `fences` moved. Returns True if stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, keys: list[str]) -> None:
+        """Delete keys and bump their fences."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invalidate_tag(self, tag_key: str) -> list[str]:
+        """Delete every key of a tag set and the set itself, bumping their fences. Returns the deleted keys."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_pattern(self, pattern: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, token: str, timeout: float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str) -> None:
+        pass
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes | str | None]:
+        """Yield None once subscribed to a channel, then the messages published on it.
+
+        Only called on backends that broadcast.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend(CacheBackend):
+    """Backend shared by every worker through Redis. Invalidations are broadcast with pub/sub."""
+
+    name = "redis"
+    broadcasts = True
+    errors = (RedisError, OSError)
+
+    def __init__(self, client: Redis, fence_ttl: int = 3600) -> None:
+        super().__init__(fence_ttl)
+        self.client = client
+
+    async def ping(self) -> None:
+        await self.client.ping()
+
+    async def get(self, key: str) -> bytes | None:
+        value: bytes | None = await self.client.get(key)
+        return value
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, int]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            value, ttl_ms = await pipe.get(key).pttl(key).execute()
+        return value, ttl_ms
+
+    async def read_fences(self, keys: list[str]) -> list[int]:
+        return [int(value or 0) for value in await self.client.mget([fence_key(key) for key in keys])]
+
+    async def fenced_set(
+        self, key: str, value: bytes, ttl: int, fences: Mapping[str, int], tag_keys: list[str]
+    ) -> bool:
+        stored = await self.client.eval(
+            _FENCED_SET_SCRIPT,
+            1 + len(fences) + len(tag_keys),
+            key,
+            *[fence_key(fenced) for fenced in fences],
+            *tag_keys,
+            value,
+            ttl,
+            len(fences),
+            *fences.values(),
+        )
+        return bool(stored)
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self.client.eval(
+                _FENCED_DELETE_SCRIPT,
+                2 * len(keys),
+                *keys,
+                *[fence_key(key) for key in keys],
+                len(keys),
+                self.fence_ttl,
+            )
+
+    async def invalidate_tag(self, tag_key: str) -> list[str]:
+        # every key a script touches is passed in KEYS, so the members are read first and the script retried
+        # if the tag gained members in between
+        keys = [key.decode() if isinstance(key, bytes) else key for key in await self.client.smembers(tag_key)]
+        while True:
+            done, members = await self.client.eval(
+                _TAG_INVALIDATE_SCRIPT,
+                2 + 2 * len(keys),
+                tag_key,
+                fence_key(tag_key),
+                *keys,
+                *[fence_key(key) for key in keys],
+                self.fence_ttl,
+                len(keys),
+            )
+            members = [key.decode() if isinstance(key, bytes) else key for key in members]
+            if done:
+                return members
+            keys = sorted(set(keys) | set(members))
+
+    async def delete_pattern(self, pattern: str) -> None:
+        cursor = -1
+        while cursor != 0:
+            cursor, keys = await self.client.scan(cursor, match=pattern, count=100)
+            if keys:
+                await self.client.delete(*keys)
+
+    async def acquire_lock(self, key: str, token: str, timeout: float) -> bool:
+        return bool(await self.client.set(key, token, nx=True, px=int(timeout * 1000)))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.client.exists(key))
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        value: int = await self.client.incr(key)
+        return value
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes | str | None]:  # type: ignore[override]
+        async with self.client.pubsub() as pubsub:
+            await pubsub.subscribe(channel)
+            yield None
+            while True:
+                # polled with a timeout, since a blocking read would be cut by the command timeout when idle
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    yield message["data"]
+
+
+class MemoryBackend(CacheBackend):
+    """Backend private to the current process, for single-worker deployments and tests.
+
+    Entries live in a bounded `LocalCache`. Every operation completes without yielding to the event loop,
+    which makes each of them atomic.
+
+    Parameters
+    ----------
+    max_entries: int, optional
+        Maximum number of cache entries. Defaults to 1024.
+    max_bytes: int, optional
+        Maximum accumulated size of the cache entries. Defaults to 64 MiB.
+    fence_ttl: int, optional
+        Seconds a fence is kept after an invalidation. Defaults to 3600.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, fence_ttl: int = 3600) -> None:
+        super().__init__(fence_ttl)
+        self.entries = LocalCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.fences: dict[str, tuple[int, float]] = {}
+        self.counters: dict[str, int] = {}
+        self.locks: dict[str, tuple[str, float]] = {}
+        self.tags: dict[str, tuple[set[str], float]] = {}
+
+    def _fence(self, key: str) -> int:
+        value, expires_at = self.fences.get(key, (0, 0.0))
+        return value if expires_at > time.monotonic() else 0
+
+    def _bump_fence(self, key: str) -> None:
+        now = time.monotonic()
+        value = self._fence(key) + 1
+        # re-inserted, so fences stay ordered by expiration and expired ones are purged from the front
+        self.fences.pop(key, None)
+        self.fences[key] = (value, now + self.fence_ttl)
+        while True:
+            fenced, (_, expires_at) = next(iter(self.fences.items()))
+            if expires_at > now:
+                break
+            del self.fences[fenced]
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        return entry[0] if entry is not None else None
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, int]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, -2
+        value, expires_at = entry
+        return value, max(int((expires_at - time.monotonic()) * 1000), 0)
+
+    async def read_fences(self, keys: list[str]) -> list[int]:
+        return [self._fence(key) for key in keys]
+
+    async def fenced_set(
+        self, key: str, value: bytes, ttl: int, fences: Mapping[str, int], tag_keys: list[str]
+    ) -> bool:
+        if any(self._fence(fenced) != expected for fenced, expected in fences.items()):
+            return False
+
+        now = time.monotonic()
+        self.entries.set(key, (value, now + ttl), len(value), ttl)
+        for tag_key in tag_keys:
+            members, expires_at = self.tags.get(tag_key, (set(), 0.0))
+            if expires_at <= now:
+                members = set()
+            members.add(key)
+            self.tags[tag_key] = (members, max(expires_at, now + ttl))
+        return True
+
+    async def delete(self, keys: list[str]) -> None:
+        for key in keys:
+            self.entries.delete(key)
+            self._bump_fence(key)
+
+    async def invalidate_tag(self, tag_key: str) -> list[str]:
+        members, expires_at = self.tags.pop(tag_key, (set(), 0.0))
+        keys = list(members) if expires_at > time.monotonic() else []
+        await self.delete(keys)
+        self._bump_fence(tag_key)
+        return keys
+
+    async def delete_pattern(self, pattern: str) -> None:
+        self.entries.delete_pattern(pattern)
+        for tag_key in [tag_key for tag_key in self.tags if fnmatch.fnmatchcase(tag_key, pattern)]:
+            del self.tags[tag_key]
+
+    async def acquire_lock(self, key: str, token: str, timeout: float) -> bool:
+        now = time.monotonic()
+        if await self.exists(key):
+            return False
+        self.locks[key] = (token, now + timeout)
+        return True
+
+    async def release_lock(self, key: str, token: str) -> None:
+        if self.locks.get(key, ("", 0.0))[0] == token:
+            del self.locks[key]
+
+    async def exists(self, key: str) -> bool:
+        lock = self.locks.get(key)
+        if lock is not None and lock[1] <= time.monotonic():
+            del self.locks[key]
+            lock = None
+        return lock is not None or key in self.entries
+
+    async def get_counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+
+class SqliteBackend(CacheBackend):
+    """Backend stored in a local SQLite file, shared by the workers of a single node.
+
+    Queries run in a worker thread. Writes take SQLite's write lock (`BEGIN IMMEDIATE`), which makes each
+    operation atomic across processes, and expired rows are purged every `purge_interval` writes.
+
+    Parameters
+    ----------
+    path: str
+        The path of the database file. It is created if missing.
+    fence_ttl: int, optional
+        Seconds a fence is kept after an invalidation. Defaults to 3600.
+    purge_interval: int, optional
+        Number of writes between purges of expired rows. Defaults to 1000.
+    """
+
+    name = "disk"
+    errors = (sqlite3.OperationalError,)
+
+    def __init__(self, path: str, fence_ttl: int = 3600, purge_interval: int = 1000) -> None:
+        super().__init__(fence_ttl)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_tags (tag TEXT, key TEXT, expires_at REAL, PRIMARY KEY (tag, key))"
+        )
+
+    async def _read(self, operation: Callable[[sqlite3.Connection, float], T]) -> T:
+        def run() -> T:
+            with self._lock:
+                return operation(self._connection, time.time())
+
+        return await asyncio.to_thread(run)
+
+    async def _write(self, operation: Callable[[sqlite3.Connection, float], T]) -> T:
+        def run() -> T:
+            with self._lock:
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    result = operation(self._connection, now)
+                    self._writes += 1
+                    if self._writes % self.purge_interval == 0:
+                        self._connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                        self._connection.execute("DELETE FROM cache_tags WHERE expires_at <= ?", (now,))
+                except BaseException:
+                    self._connection.execute("ROLLBACK")
+                    raise
+                self._connection.execute("COMMIT")
+                return result
+
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _select(connection: sqlite3.Connection, now: float, key: str) -> tuple[Any, float | None] | None:
+        row: tuple[Any, float | None] | None = connection.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, now),
+        ).fetchone()
+        return row
+
+    @classmethod
+    def _fence(cls, connection: sqlite3.Connection, now: float, key: str) -> int:
+        row = cls._select(connection, now, fence_key(key))
+        return int(row[0]) if row is not None else 0
+
+    def _delete(self, connection: sqlite3.Connection, now: float, keys: list[str]) -> None:
+        for key in keys:
+            connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)",
+                (fence_key(key), self._fence(connection, now, key) + 1, now + self.fence_ttl),
+            )
+
+    async def get(self, key: str) -> bytes | None:
+        row = await self._read(lambda connection, now: self._select(connection, now, key))
+        return row[0] if row is not None else None
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, int]:
+        row = await self._read(lambda connection, now: (self._select(connection, now, key), now))
+        entry, now = row
+        if entry is None:
+            return None, -2
+        value, expires_at = entry
+        return value, -1 if expires_at is None else int((expires_at - now) * 1000)
+
+    async def read_fences(self, keys: list[str]) -> list[int]:
+        return await self._read(lambda connection, now: [self._fence(connection, now, key) for key in keys])
+
+    async def fenced_set(
+        self, key: str, value: bytes, ttl: int, fences: Mapping[str, int], tag_keys: list[str]
+    ) -> bool:
+        def operation(connection: sqlite3.Connection, now: float) -> bool:
+            if any(self._fence(connection, now, fenced) != expected for fenced, expected in fences.items()):
+                return False
+
+            connection.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)", (key, value, now + ttl))
+            for tag_key in tag_keys:
+                connection.execute(
+                    "INSERT INTO cache_tags VALUES (?, ?, ?) ON CONFLICT (tag, key) DO UPDATE SET "
+                    "expires_at = MAX(expires_at, excluded.expires_at)",
+                    (tag_key, key, now + ttl),
+                )
+            return True
+
+        return await self._write(operation)
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self._write(lambda connection, now: self._delete(connection, now, keys))
+
+    async def invalidate_tag(self, tag_key: str) -> list[str]:
+        def operation(connection: sqlite3.Connection, now: float) -> list[str]:
+            keys = [
+                key
+                for (key,) in connection.execute(
+                    "SELECT key FROM cache_tags WHERE tag = ? AND expires_at > ?", (tag_key, now)
+                )
+            ]
+            connection.execute("DELETE FROM cache_tags WHERE tag = ?", (tag_key,))
+            self._delete(connection, now, [*keys, tag_key])
+            return keys
+
+        return await self._write(operation)
+
+    async def delete_pattern(self, pattern: str) -> None:
+        def operation(connection: sqlite3.Connection, now: float) -> None:
+            connection.execute("DELETE FROM cache_entries WHERE key GLOB ?", (pattern,))
+            connection.execute("DELETE FROM cache_tags WHERE tag GLOB ?", (pattern,))
+
+        await self._write(operation)
+
+    async def acquire_lock(self, key: str, token: str, timeout: float) -> bool:
+        def operation(connection: sqlite3.Connection, now: float) -> bool:
+            if self._select(connection, now, key) is not None:
+                return False
+            connection.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)", (key, token, now + timeout))
+            return True
+
+        return await self._write(operation)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._write(
+            lambda connection, now: connection.execute(
+                "DELETE FROM cache_entries WHERE key = ? AND value = ?", (key, token)
+            )
+        )
+
+    async def exists(self, key: str) -> bool:
+        return await self._read(lambda connection, now: self._select(connection, now, key) is not None)
+
+    async def get_counter(self, key: str) -> int:
+        row = await self._read(lambda connection, now: self._select(connection, now, key))
+        return int(row[0]) if row is not None else 0
+
+    async def incr(self, key: str) -> int:
+        def operation(connection: sqlite3.Connection, now: float) -> int:
+            row = self._select(connection, now, key)
+            value = (int(row[0]) if row is not None else 0) + 1
+            connection.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, NULL)", (key, value))
+            return value
+
+        return await self._write(operation)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._connection.close)
@@ -0,0 +1,242 @@
+import gzip
+import zlib
+from collections.abc import Sequence
+from typing import Protocol
+
+from ..exceptions.cache_exceptions import UnknownCodecError
+
+
+class Compressor(Protocol):
+    """An incremental compressor, as returned by `zlib.compressobj`."""
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class CacheCodec:
+    """Base class for the codecs used to compress cached response bodies.
+
+    Attributes
+    ----------
+    id: int
+        The identifier written in each cache entry header. It must never be reused for another codec,
+        since entries written by older deployments are decoded by looking it up.
+    name: str
+        The name used to pick the codec in settings and in the `cache` decorator.
+    content_encoding: str | None
+        The HTTP `Content-Encoding` matching the compressed bytes, if any. Codecs setting it must also
+        implement `compressor`, which is used to compress streamed responses.
+    """
+
+    id: int = 0
+    name: str = "identity"
+    content_encoding: str | None = None
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def compressor(self) -> Compressor:
+        raise NotImplementedError
+
+
+class ZlibCodec(CacheCodec):
+    id = 1
+    name = "zlib"
+    content_encoding = "deflate"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+    def compressor(self) -> Compressor:
+        return zlib.compressobj(self.level)
+
+
+class GzipCodec(CacheCodec):
+    id = 2
+    name = "gzip"
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, self.level, mtime=0)
+
+    def decompress(self, data: bytes) -> bytes:
+        return gzip.decompress(data)
+
+    def compressor(self) -> Compressor:
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+_codecs_by_name: dict[str, CacheCodec] = {}
+_codecs_by_id: dict[int, CacheCodec] = {}
+
+
+def register_codec(codec: CacheCodec) -> None:
+    """Register a codec so it can be selected by name and decoded by id.
+
+    Parameters
+    ----------
+    codec: CacheCodec
+        The codec instance. Registering a codec with an existing name or id replaces the previous one.
+    """
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_id[codec.id] = codec
+
+
+def get_codec(name: str) -> CacheCodec:
+    try:
+        return _codecs_by_name[name]
+    except KeyError:
+        raise UnknownCodecError(f"Cache codec '{name}' not registered.")
+
+
+def get_codec_by_id(codec_id: int) -> CacheCodec:
+    try:
+        return _codecs_by_id[codec_id]
+    except KeyError:
+        raise UnknownCodecError(f"Cache codec with id {codec_id} not registered.")
+
+
+def get_content_codecs(content_encodings: Sequence[str]) -> dict[str, CacheCodec]:
+    """Return the registered codecs producing the given HTTP content codings, in the same order.
+
+    Content codings without a registered codec (e.g. "br" when brotli is not installed) are left out.
+    """
+    by_encoding = {codec.content_encoding: codec for codec in _codecs_by_name.values() if codec.content_encoding}
+    return {encoding: by_encoding[encoding] for encoding in content_encodings if encoding in by_encoding}
+
+
+def negotiate_content_encoding(accept_encoding: str | None, content_encodings: Sequence[str]) -> str | None:
+    """Pick the content coding to send a response with, given the request's `Accept-Encoding` header.
+
+    Parameters
+    ----------
+    accept_encoding: str | None
+        The value of the `Accept-Encoding` header, e.g. "gzip, deflate;q=0.5, *;q=0".
+    content_encodings: Sequence[str]
+        The content codings the server can produce, most preferred first.
+
+    Returns
+    -------
+    str | None
+        The accepted content coding with the highest quality value, ties being broken by the server's
+        preference, or None if the response should not be compressed.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in content_encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+register_codec(CacheCodec())
+register_codec(ZlibCodec())
+register_codec(GzipCodec())
+
+try:
+    import lz4.frame
+
+    class LZ4Codec(CacheCodec):
+        id = 3
+        name = "lz4"
+
+        def compress(self, data: bytes) -> bytes:
+            return bytes(lz4.frame.compress(data))
+
+        def decompress(self, data: bytes) -> bytes:
+            return bytes(lz4.frame.decompress(data))
+
+    register_codec(LZ4Codec())
+
+except ImportError:
+    pass
+
+try:
+    import brotli
+
+    class _BrotliCompressor:
+        def __init__(self, quality: int) -> None:
+            self._compressor = brotli.Compressor(quality=quality)
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.process(data)
+
+        def flush(self) -> bytes:
+            return self._compressor.finish()
+
+    class BrotliCodec(CacheCodec):
+        id = 4
+        name = "brotli"
+        content_encoding = "br"
+
+        def __init__(self, quality: int = 4) -> None:
+            self.quality = quality
+
+        def compress(self, data: bytes) -> bytes:
+            return brotli.compress(data, quality=self.quality)
+
+        def decompress(self, data: bytes) -> bytes:
+            return brotli.decompress(data)
+
+        def compressor(self) -> Compressor:
+            return _BrotliCompressor(self.quality)
+
+    register_codec(BrotliCodec())
+
+except ImportError:
+    pass
+
+try:
+    import zstandard
+
+    class ZstdCodec(CacheCodec):
+        id = 5
+        name = "zstd"
+        content_encoding = "zstd"
+
+        def __init__(self, level: int = 3) -> None:
+            self.level = level
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.compress(data)
+
+        def decompress(self, data: bytes) -> bytes:
+            return self._decompressor.decompress(data)
+
+        def compressor(self) -> Compressor:
+            return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    register_codec(ZstdCodec())
+
+except ImportError:
+    pass
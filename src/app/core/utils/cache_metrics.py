@@ -0,0 +1,298 @@
+import asyncio
+import bisect
+import fnmatch
+import json
+import os
+import re
+import socket
+import time
+from collections import defaultdict
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRICS_KEY = "cache_metrics"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets (in seconds), the last bucket being +Inf."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+class HotKeyTracker:
+    """Bounded-memory tracker of the most looked-up cache keys, using a count-min sketch and a top-K table.
+
+    Parameters
+    ----------
+    top_k: int, optional
+        Number of keys tracked individually. Defaults to 50.
+    width: int, optional
+        Number of counters per row of the sketch. Defaults to 2048.
+    depth: int, optional
+        Number of rows of the sketch. Defaults to 4.
+
+    Note
+    ----
+        - Memory is fixed at `width * depth` counters plus `top_k` entries, whatever the number of keys.
+        - Estimates never undercount, and overcount by about `e / width` of all lookups with high probability.
+        - Hits and lookups of a key are only counted once it is in the top-K table, so its hit ratio covers
+          that period.
+        - `decay` halves every count, so the table follows recent traffic when it is called periodically.
+    """
+
+    def __init__(self, top_k: int = 50, width: int = 2048, depth: int = 4) -> None:
+        self.top_k = top_k
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.top: dict[str, list[int]] = {}
+        self._threshold = 0
+
+    def record(self, key: str, hit: bool) -> None:
+        key_hash = hash(key)
+        h1, h2 = key_hash & 0xFFFFFFFF, (key_hash >> 32) | 1
+        estimate = -1
+        for row_number, row in enumerate(self.rows):
+            index = (h1 + row_number * h2) % self.width
+            row[index] += 1
+            if estimate < 0 or row[index] < estimate:
+                estimate = row[index]
+
+        entry = self.top.get(key)
+        if entry is not None:
+            entry[0] = estimate
+            entry[1] += hit
+            entry[2] += 1
+            return
+
+        if len(self.top) < self.top_k:
+            self.top[key] = [estimate, int(hit), 1]
+            return
+
+        if estimate <= self._threshold:
+            return
+
+        coldest = min(self.top, key=lambda tracked: self.top[tracked][0])
+        if estimate > self.top[coldest][0]:
+            del self.top[coldest]
+            self.top[key] = [estimate, int(hit), 1]
+            coldest = min(self.top, key=lambda tracked: self.top[tracked][0])
+        self._threshold = self.top[coldest][0]
+
+    def decay(self) -> None:
+        self.rows = [[count >> 1 for count in row] for row in self.rows]
+        self.top = {
+            key: [estimate >> 1, hits >> 1, lookups >> 1]
+            for key, (estimate, hits, lookups) in self.top.items()
+            if estimate > 1
+        }
+        self._threshold = min((entry[0] for entry in self.top.values()), default=0)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {"key": key, "estimate": estimate, "hits": hits, "lookups": lookups}
+            for key, (estimate, hits, lookups) in sorted(self.top.items(), key=lambda item: -item[1][0])
+        ]
+
+
+class CacheMetrics:
+    """Per-worker cache counters and latency histograms, labelled by cache key prefix, and hot keys.
+
+    Counted events are `hit_local`, `hit`, `stale_hit`, `miss`, `fill`, `negative_fill`, `fill_discarded`,
+    `not_modified` (answered with a 304), `bypass` (the backend was unavailable) and `invalidation`.
+    Observed latencies are `lookup` (cache hits), `fill` (endpoint call plus store) and `pattern_delete`.
+    Lookups are also recorded per key in `hot_keys`.
+    """
+
+    def __init__(self) -> None:
+        self.counters: defaultdict[str, defaultdict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.latencies: defaultdict[str, defaultdict[str, LatencyHistogram]] = defaultdict(
+            lambda: defaultdict(LatencyHistogram)
+        )
+        self.hot_keys = HotKeyTracker()
+
+    def increment(self, key_prefix: str, event: str, amount: int = 1) -> None:
+        self.counters[key_prefix][event] += amount
+
+    def observe(self, key_prefix: str, operation: str, seconds: float) -> None:
+        self.latencies[key_prefix][operation].observe(seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "updated_at": time.time(),
+            "counters": {prefix: dict(events) for prefix, events in self.counters.items()},
+            "latencies": {
+                prefix: {operation: histogram.snapshot() for operation, histogram in operations.items()}
+                for prefix, operations in self.latencies.items()
+            },
+            "hot_keys": self.hot_keys.snapshot(),
+        }
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.latencies.clear()
+        self.hot_keys = HotKeyTracker(self.hot_keys.top_k, self.hot_keys.width, self.hot_keys.depth)
+
+
+metrics = CacheMetrics()
+
+
+def merge_snapshots(snapshots: list[dict[str, Any]]) -> dict[str, Any]:
+    """Sum the counters, histograms and hot keys of several worker snapshots, adding hit ratios."""
+    counters: defaultdict[str, defaultdict[str, int]] = defaultdict(lambda: defaultdict(int))
+    latencies: dict[str, dict[str, dict[str, Any]]] = defaultdict(dict)
+    hot_keys: defaultdict[str, defaultdict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    for snapshot in snapshots:
+        for hot_key in snapshot.get("hot_keys", []):
+            for field in ("estimate", "hits", "lookups"):
+                hot_keys[hot_key["key"]][field] += hot_key[field]
+
+        for prefix, events in snapshot["counters"].items():
+            for event, count in events.items():
+                counters[prefix][event] += count
+
+        for prefix, operations in snapshot["latencies"].items():
+            for operation, histogram in operations.items():
+                merged = latencies[prefix].setdefault(
+                    operation, {"counts": [0] * (len(LATENCY_BUCKETS) + 1), "sum": 0.0, "count": 0}
+                )
+                merged["counts"] = [a + b for a, b in zip(merged["counts"], histogram["counts"])]
+                merged["sum"] += histogram["sum"]
+                merged["count"] += histogram["count"]
+
+    result: dict[str, Any] = {"buckets": [*LATENCY_BUCKETS, "+Inf"], "workers": len(snapshots), "prefixes": {}}
+    for prefix in counters.keys() | latencies.keys():
+        events = dict(counters[prefix])
+        hits = events.get("hit_local", 0) + events.get("hit", 0) + events.get("stale_hit", 0)
+        lookups = hits + events.get("miss", 0)
+        result["prefixes"][prefix] = {
+            "counters": events,
+            "hit_ratio": hits / lookups if lookups else None,
+            "latencies": latencies.get(prefix, {}),
+        }
+
+    top_k = max((len(snapshot.get("hot_keys", [])) for snapshot in snapshots), default=0)
+    result["hot_keys"] = [
+        {"key": key, **counts, "hit_ratio": counts["hits"] / counts["lookups"] if counts["lookups"] else None}
+        for key, counts in sorted(hot_keys.items(), key=lambda item: -item[1]["estimate"])[:top_k]
+    ]
+    return result
+
+
+async def publish_metrics(client: Redis) -> None:
+    """Store this worker's metrics snapshot in the shared `cache_metrics` hash."""
+    await client.hset(METRICS_KEY, WORKER_ID, json.dumps(metrics.snapshot()))
+
+
+async def publish_metrics_periodically(client: Redis, interval: float) -> None:
+    """Publish this worker's metrics snapshot every `interval` seconds, for the lifetime of the app.
+
+    Hot key counts are halved after each publication, so they reflect the last few intervals.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await publish_metrics(client)
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Could not publish cache metrics: {exc}")
+        metrics.hot_keys.decay()
+
+
+async def read_metrics(client: Redis, max_age: float) -> dict[str, Any]:
+    """Aggregate the snapshots of every worker that published within the last `max_age` seconds.
+
+    Snapshots of workers that stopped publishing are removed from the hash.
+    """
+    now = time.time()
+    snapshots = []
+    stale_workers = []
+    for worker_id, data in (await client.hgetall(METRICS_KEY)).items():
+        snapshot = json.loads(data)
+        if now - snapshot["updated_at"] > max_age:
+            stale_workers.append(worker_id)
+        else:
+            snapshots.append(snapshot)
+
+    if stale_workers:
+        await client.hdel(METRICS_KEY, *stale_workers)
+
+    return merge_snapshots(snapshots)
+
+
+def prefix_to_pattern(key_prefix: str) -> str:
+    """Turn a key prefix template such as "products:items_per_page_{items_per_page}:page" into a glob."""
+    return re.sub(r"{.*?}", "*", key_prefix) + ":*"
+
+
+async def sample_memory_by_prefix(client: Redis, key_prefixes: set[str], sample_size: int = 1000) -> dict[str, Any]:
+    """Estimate the Redis memory used by each cache key prefix from a sample of the keyspace.
+
+    Parameters
+    ----------
+    client: Redis
+        The Redis client.
+    key_prefixes: Set[str]
+        The key prefix templates to attribute keys to.
+    sample_size: int, optional
+        The maximum number of keys to sample. Defaults to 1000.
+
+    Returns
+    -------
+    Dict[str, Any]
+        For each prefix, the number of sampled keys, their memory usage and the estimated total usage,
+        extrapolated from the sampled fraction of the keyspace.
+
+    Note
+    ----
+        - Keys are sampled with SCAN and measured with MEMORY USAGE in a single pipeline, so the cost is
+          bounded by `sample_size` regardless of the size of the keyspace.
+    """
+    patterns = {prefix: prefix_to_pattern(prefix) for prefix in key_prefixes}
+    keys: list[bytes] = []
+    async for key in client.scan_iter(count=min(sample_size, 1000)):
+        keys.append(key)
+        if len(keys) >= sample_size:
+            break
+
+    async with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key)
+        usages = await pipe.execute()
+
+    total_keys = await client.dbsize()
+    scale = total_keys / len(keys) if keys else 0
+    result: dict[str, Any] = {
+        prefix: {"sampled_keys": 0, "sampled_bytes": 0, "estimated_bytes": 0} for prefix in key_prefixes
+    }
+    for key, usage in zip(keys, usages):
+        name = key.decode() if isinstance(key, bytes) else key
+        for prefix, pattern in patterns.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                result[prefix]["sampled_keys"] += 1
+                result[prefix]["sampled_bytes"] += usage or 0
+                break
+
+    for stats in result.values():
+        stats["estimated_bytes"] = int(stats["sampled_bytes"] * scale)
+
+    return {"total_keys": total_keys, "sampled_keys": len(keys), "prefixes": result}
@@ -0,0 +1,81 @@
+import asyncio
+from contextvars import ContextVar
+
+import httpx
+from fastapi import FastAPI
+
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+warming: ContextVar[bool] = ContextVar("warming", default=False)
+
+
+class CacheWarmer:
+    """Repopulate a set of hot cached endpoints by requesting them through the application itself.
+
+    Requests go through the ASGI app in-process, so entries are filled by the same `cache` decorator code
+    path as real traffic (including single-flight locking, which keeps several workers warming at once
+    from hitting the database more than once per key). `warming` is set while they are handled, which
+    exempts them from rate limiting; unlike a header, it cannot be sent by an outside client.
+
+    Parameters
+    ----------
+    app: FastAPI
+        The application to send the warm-up requests to.
+    paths: List[str]
+        The paths (with query strings) to request, e.g. "/api/v1/products?page=2".
+    concurrency: int, optional
+        The maximum number of warm-up requests in flight. Defaults to 4.
+    """
+
+    def __init__(self, app: FastAPI, paths: list[str], concurrency: int = 4) -> None:
+        self.app = app
+        self.paths = paths
+        self.concurrency = concurrency
+        self._task: asyncio.Task | None = None
+        self._rerun = False
+
+    async def warm(self, paths: list[str] | None = None) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        transport = httpx.ASGITransport(app=self.app)  # type: ignore[arg-type]
+        token = warming.set(True)
+
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://cache-warmer") as client:
+
+                async def fetch(path: str) -> None:
+                    async with semaphore:
+                        try:
+                            response = await client.get(path)
+                            if response.status_code >= 400:
+                                logger.warning(f"Cache warm-up of {path} returned {response.status_code}")
+                        except Exception as exc:
+                            logger.warning(f"Cache warm-up of {path} failed: {exc}")
+
+                await asyncio.gather(*(fetch(path) for path in (paths or self.paths)))
+        finally:
+            warming.reset(token)
+
+    def schedule(self) -> None:
+        """Warm every configured path in the background, coalescing calls made while a run is in progress."""
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._rerun = False
+            await self.warm()
+            if not self._rerun:
+                return
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+warmer: CacheWarmer | None = None
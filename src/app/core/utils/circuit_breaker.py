@@ -0,0 +1,55 @@
+import time
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while, then let a single probe check whether it recovered.
+
+    Parameters
+    ----------
+    failure_threshold: int, optional
+        Number of consecutive failures that open the circuit. Defaults to 5.
+    recovery_timeout: float, optional
+        Seconds the circuit stays open before a probe is allowed. Defaults to 30.
+
+    Note
+    ----
+        - The circuit is "closed" while calls are allowed, "open" while they are refused, and "half_open"
+          once `recovery_timeout` has elapsed: `allow_request` then returns True to exactly one caller,
+          whose `record_success` closes the circuit and whose `record_failure` opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.recovery_timeout:
+            return "open"
+        return "half_open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+
+        self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
@@ -0,0 +1,46 @@
+import hashlib
+
+
+def make_etag(body: bytes) -> str:
+    """Return a strong entity tag for a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def variant_etag(etag: str, content_encoding: str) -> str:
+    """Return the entity tag of the representation of a body compressed with `content_encoding`.
+
+    Example
+    -------
+    >>> variant_etag('"abc"', "gzip")
+    '"abc-gzip"'
+    """
+    return f'{etag[:-1]}-{content_encoding}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    """Evaluate an `If-None-Match` header against a response's entity tag.
+
+    Parameters
+    ----------
+    if_none_match: str | None
+        The value of the request's `If-None-Match` header, a comma-separated list of entity tags or "*".
+    etag: str | None
+        The entity tag of the current representation.
+
+    Returns
+    -------
+    bool
+        True if the client's copy is current and a 304 can be sent instead of the body.
+
+    Note
+    ----
+        - The weak comparison required for `If-None-Match` is used, so `W/` prefixes are ignored.
+    """
+    if not if_none_match or not etag:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
@@ -0,0 +1,73 @@
+import fnmatch
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL and a total byte-size cap.
+
+    Parameters
+    ----------
+    max_entries: int, optional
+        Maximum number of entries kept in memory. Defaults to 1024.
+    max_bytes: int, optional
+        Maximum accumulated size (in bytes) of the stored entries. Defaults to 64 MiB.
+
+    Note
+    ----
+        - Entries are evicted in least-recently-used order once either bound is exceeded.
+        - Expired entries are dropped lazily when they are read.
+        - The size of an entry is provided by the caller, usually the length of its serialized form.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: float) -> None:
+        if size > self.max_bytes or ttl <= 0:
+            self.delete(key)
+            return
+
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.current_bytes += size
+
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def delete_pattern(self, pattern: str) -> None:
+        for key in [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]:
+            self.delete(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from .cache_metrics import LATENCY_BUCKETS, LatencyHistogram
+
+T = TypeVar("T")
+
+
+class HashingMetrics:
+    """Per-worker latency histograms of the password hashing pool, by operation, plus the time spent queued."""
+
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+
+    def observe(self, operation: str, seconds: float) -> None:
+        self.latencies[operation].observe(seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "buckets": [*LATENCY_BUCKETS, "+Inf"],
+            "latencies": {operation: histogram.snapshot() for operation, histogram in self.latencies.items()},
+        }
+
+    def reset(self) -> None:
+        self.latencies.clear()
+
+
+executor: ThreadPoolExecutor | None = None
+metrics = HashingMetrics()
+
+
+async def run(operation: str, func: Callable[..., T], *args: Any) -> T:
+    """Run a password hashing call in the dedicated thread pool, so it does not block the event loop.
+
+    Parameters
+    ----------
+    operation: str
+        The name the call's duration is observed under, e.g. "hash" or "verify".
+    func: Callable[..., T]
+        The blocking function, e.g. `bcrypt.checkpw`.
+    *args: Any
+        The arguments of `func`.
+
+    Returns
+    -------
+    T
+        The result of `func`.
+
+    Note
+    ----
+        - bcrypt releases the GIL while it works, so the pool's threads run in parallel. The number of
+          threads caps the concurrent calls, and later calls wait in the pool's queue.
+        - The time spent in the queue and in the call are observed as the "queue" and `operation` latencies
+          of this worker's `metrics`.
+        - Without a configured pool, e.g. in scripts, the event loop's default executor is used.
+    """
+    submitted = time.perf_counter()
+
+    def timed() -> tuple[T, float, float]:
+        started = time.perf_counter()
+        result = func(*args)
+        return result, started - submitted, time.perf_counter() - started
+
+    result, queued, elapsed = await asyncio.get_running_loop().run_in_executor(executor, timed)
+    metrics.observe("queue", queued)
+    metrics.observe(operation, elapsed)
+    return result
@@ -0,0 +1,155 @@
+import ipaddress
+import math
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..logger import logging
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+_SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local pending = tonumber(ARGV[4])
+local current = tonumber(redis.call("get", KEYS[1]) or "0")
+if pending > 0 then
+    current = redis.call("incrby", KEYS[1], pending)
+    redis.call("expire", KEYS[1], 2 * period)
+end
+local previous = tonumber(redis.call("get", KEYS[2]) or "0")
+local allowed = 0
+if previous * (period - elapsed) / period + current <= limit - 1 then
+    current = redis.call("incr", KEYS[1])
+    redis.call("expire", KEYS[1], 2 * period)
+    allowed = 1
+end
+return {allowed, current, previous}
+"""
+
+client: Redis | None = None
+local_share: float = 0.1
+local_counts = LocalCache(max_entries=10_000)
+trusted_proxies: list[ipaddress.IPv4Network | ipaddress.IPv6Network] = []
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_address(peer: str | None, forwarded_for: str | None) -> str:
+    """Return the address of the client a request comes from, as far as the trusted proxies tell.
+
+    `X-Forwarded-For` is only believed when the peer is one of `trusted_proxies`. It is then read from the
+    right, skipping the trusted proxies, so a client cannot choose its address by sending the header itself.
+
+    Parameters
+    ----------
+    peer: str | None
+        The address of the connection's peer, e.g. `request.client.host`.
+    forwarded_for: str | None
+        The request's `X-Forwarded-For` header.
+
+    Returns
+    -------
+    str
+        The client's address, or "unknown" without a peer.
+    """
+    address = peer or "unknown"
+    if not forwarded_for or not _is_trusted(address):
+        return address
+
+    for hop in reversed(forwarded_for.split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if not _is_trusted(hop):
+            break
+    return address
+
+
+def _retry_after(limit: int, period: int, elapsed: float, current: int, previous: int) -> int:
+    """Seconds until the weighted count of a key leaves room for one more request, assuming no other request."""
+    if current < limit and previous:
+        wait = period * (1 - (limit - 1 - current) / previous) - elapsed
+    else:
+        # the current window alone is full, so it has to become the previous one and decay
+        wait = period - elapsed + period * (1 - (limit - 1) / current)
+    return max(1, math.ceil(wait))
+
+
+async def check(key: str, limit: int, period: int) -> int | None:
+    """Count a request against a sliding window limit.
+
+    Parameters
+    ----------
+    key: str
+        What the limit applies to, e.g. a route and a client.
+    limit: int
+        The maximum number of requests in any `period`.
+    period: int
+        The length of the window, in seconds.
+
+    Returns
+    -------
+    int | None
+        None if the request is allowed, otherwise the number of seconds after which it would be.
+
+    Note
+    ----
+        - The window is approximated by weighting the count of the previous fixed window by the part of it
+          still covered, and adding the count of the current one. Both live in Redis and are updated by a
+          single script, so concurrent workers cannot exceed the limit between a read and a write.
+        - After each Redis call, a worker may admit up to `local_share` of the room left for the key on its
+          own, without calling Redis, and reports them on its next call. Clients far below their limit thus
+          rarely cost a network round trip; the limit holds as long as `local_share` is at most one over
+          the number of workers.
+        - Without a Redis client, or while it is unavailable, every request is allowed.
+    """
+    window, elapsed = divmod(time.time(), period)
+    state = local_counts.get(key)
+    if state is None:
+        state = [window, 0.0, 0]
+        local_counts.set(key, state, size=1, ttl=2 * period)
+    elif state[0] != window:
+        # requests admitted locally in the previous window are counted in this one, erring on the safe side
+        state[0], state[1] = window, 0.0
+
+    if state[2] + 1 <= local_share * state[1]:
+        state[2] += 1
+        return None
+
+    if client is None:
+        return None
+
+    pending, state[2] = state[2], 0
+    try:
+        allowed, current, previous = await client.eval(
+            _SLIDING_WINDOW_SCRIPT,
+            2,
+            f"rate_limit:{key}:{int(window)}",
+            f"rate_limit:{key}:{int(window) - 1}",
+            limit,
+            period,
+            elapsed,
+            pending,
+        )
+    except (RedisError, OSError) as exc:
+        logger.warning(f"Rate limit not checked, allowing the request: {exc}")
+        return None
+
+    if state[0] == window:
+        state[1] = limit - (previous * (period - elapsed) / period + current)
+
+    if allowed:
+        return None
+
+    return _retry_after(limit, period, elapsed, current, previous)
@@ -0,0 +1,99 @@
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models.permission import Permission
+from ...models.role_permission import RolePermission
+from . import cache
+
+NAMESPACE = "rbac"
+
+snapshot: dict[int, frozenset[str]] = {}
+snapshot_generation: int | None = None
+_refresh_lock = asyncio.Lock()
+
+
+async def load_snapshot(db: AsyncSession) -> dict[int, frozenset[str]]:
+    """Read the name of every permission granted to each role, in a single query."""
+    result = await db.execute(
+        select(RolePermission.role_id, Permission.name).join(Permission, Permission.id == RolePermission.permission_id)
+    )
+    permissions: defaultdict[int, set[str]] = defaultdict(set)
+    for role_id, name in result.tuples():
+        permissions[role_id].add(name)
+    return {role_id: frozenset(names) for role_id, names in permissions.items()}
+
+
+async def refresh(db: AsyncSession, generation: int) -> None:
+    """Replace this worker's snapshot by a fresh one, unless it already matches `generation`.
+
+    `generation` must be read before the snapshot is loaded, so a write committed while it is being
+    loaded bumps the generation again and the next check reloads it.
+    """
+    global snapshot, snapshot_generation
+
+    async with _refresh_lock:
+        if snapshot_generation == generation:
+            return
+
+        loaded = await load_snapshot(db)
+        snapshot, snapshot_generation = loaded, generation
+
+
+async def preload(db: AsyncSession) -> None:
+    """Load the snapshot at startup, so the first permission checks do not have to."""
+    generation = await cache.namespace_generation(NAMESPACE)
+    if generation is not None:
+        await refresh(db, generation)
+
+
+async def has_permission(db: AsyncSession, role_id: int | None, permission_name: str) -> bool:
+    """Check whether a role was granted a permission.
+
+    Parameters
+    ----------
+    db: AsyncSession
+        Database session, used only when the snapshot has to be (re)loaded or the cache is unavailable.
+    role_id: int | None
+        The role of the user.
+    permission_name: str
+        The name of the permission, e.g. "product.create".
+
+    Returns
+    -------
+    bool
+        Whether the role holds the permission.
+
+    Note
+    ----
+        - The check is a set lookup in this worker's snapshot of the role to permissions mapping. The
+          snapshot is versioned by the generation of the "rbac" cache namespace, which `bump_version`
+          increments and broadcasts to every worker, so it is only reloaded after a write. Until this worker
+          is subscribed to the broadcasts, e.g. at startup or after a dropped connection, the generation is
+          read from the cache backend on every check, so a bump sent meanwhile is not missed.
+        - Without a cache backend, or while it is unavailable, the database is queried on every check.
+    """
+    generation = await cache.namespace_generation(NAMESPACE)
+    if generation is None:
+        result = await db.execute(
+            select(RolePermission.id)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+            .where(RolePermission.role_id == role_id, Permission.name == permission_name)
+            .limit(1)
+        )
+        return result.first() is not None
+
+    if generation != snapshot_generation:
+        await refresh(db, generation)
+
+    return role_id is not None and permission_name in snapshot.get(role_id, frozenset())
+
+
+async def bump_version() -> None:
+    """Make every worker reload its snapshot. Call it after any write to roles, permissions or their links."""
+    if cache.backend is None:
+        return
+
+    await cache.invalidate([], namespaces=[NAMESPACE])
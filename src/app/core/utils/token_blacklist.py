@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from datetime import datetime
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.database import local_session
+from ..db.token_blacklist import TokenBlacklist
+from .bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+client: Redis | None = None
+bloom: BloomFilter | None = None
+bloom_capacity: int = 100_000
+bloom_error_rate: float = 0.001
+channel: str = "token_blacklist:revocations"
+subscribed: bool = False
+pending_revocations: "deque[tuple[str, datetime]]" = deque(maxlen=10000)
+
+_received_during_rebuild: list[str] | None = None
+
+
+def hash_token(token: str) -> str:
+    """Return the fixed-size identifier under which a token's revocation is recorded, in Redis and the database."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _key(token_hash: str) -> str:
+    return f"token_blacklist:{token_hash}"
+
+
+def _remember(token_hash: str) -> None:
+    if bloom is not None:
+        bloom.add(token_hash)
+    if _received_during_rebuild is not None:
+        _received_during_rebuild.append(token_hash)
+
+
+async def _propagate(token_hash: str, expires_at: datetime) -> None:
+    await client.set(_key(token_hash), 1, exat=int(expires_at.timestamp()))  # type: ignore[union-attr]
+    await client.publish(channel, token_hash)  # type: ignore[union-attr]
+
+
+async def _replay_revocations() -> None:
+    while pending_revocations:
+        await _propagate(*pending_revocations[0])
+        pending_revocations.popleft()
+
+
+async def revoke(token_hash: str, expires_at: datetime) -> None:
+    """Record a revocation in Redis until the token expires, and broadcast it to every worker's Bloom filter.
+
+    The database row written by the caller stays the durable record. If Redis is unavailable, the revocation
+    is queued and `listen_for_revocations` propagates it as soon as Redis answers again; meanwhile, workers
+    whose subscription is down check the database for every token (see `is_revoked`).
+
+    Parameters
+    ----------
+    token_hash: str
+        The hash of the revoked token, as returned by `hash_token`.
+    expires_at: datetime
+        The token's expiration, after which the revocation no longer needs to be checked.
+    """
+    _remember(token_hash)
+    if client is None:
+        return
+
+    try:
+        await _propagate(token_hash, expires_at)
+    except (RedisError, OSError) as exc:
+        logger.warning(f"Token revocation not propagated through Redis, queued for retry: {exc}")
+        if len(pending_revocations) == pending_revocations.maxlen:
+            logger.error("Too many token revocations queued while Redis is unavailable, dropping the oldest")
+        pending_revocations.append((token_hash, expires_at))
+
+
+async def is_revoked(token_hash: str) -> bool | None:
+    """Check whether a token was revoked, without any network call for the common, not revoked, case.
+
+    Parameters
+    ----------
+    token_hash: str
+        The hash of the token, as returned by `hash_token`.
+
+    Returns
+    -------
+    bool | None
+        False if the Bloom filter rules the token out, otherwise whether Redis holds its revocation. None
+        if the answer is unknown (filter not loaded yet, Redis unavailable, or revocations possibly missed
+        because the subscription is down), in which case the caller must check the database.
+    """
+    if bloom is None or (client is not None and not subscribed):
+        return None
+
+    if token_hash not in bloom:
+        return False
+
+    if client is None:
+        return None
+
+    try:
+        return bool(await client.exists(_key(token_hash)))
+    except (RedisError, OSError) as exc:
+        logger.warning(f"Token blacklist lookup failed, falling back to the database: {exc}")
+        return None
+
+
+async def rebuild(db: AsyncSession, restore: bool = False) -> None:
+    """Rebuild the Bloom filter from the revocations stored in the database that have not expired yet.
+
+    Filters cannot forget items, so rebuilding drops expired revocations, and it recovers any broadcast
+    missed while the subscription was down. Revocations received while the database is queried are kept.
+
+    Parameters
+    ----------
+    db: AsyncSession
+        Database session used to read the `token_blacklist` table.
+    restore: bool, optional
+        Whether to also write the revocations back to Redis, e.g. at startup in case Redis lost its data.
+    """
+    global bloom, _received_during_rebuild
+
+    _received_during_rebuild = []
+    try:
+        query = select(TokenBlacklist.token_hash, TokenBlacklist.expires_at)
+        result = await db.execute(query.where(TokenBlacklist.expires_at > datetime.now()))
+        revocations = list(result.tuples())
+
+        rebuilt = BloomFilter(capacity=max(bloom_capacity, 2 * len(revocations)), error_rate=bloom_error_rate)
+        for token_hash, _ in revocations:
+            rebuilt.add(token_hash)
+        for token_hash in _received_during_rebuild:
+            rebuilt.add(token_hash)
+        bloom = rebuilt
+    finally:
+        _received_during_rebuild = None
+
+    if restore and client is not None and revocations:
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for token_hash, expires_at in revocations:
+                    pipe.set(_key(token_hash), 1, exat=int(expires_at.timestamp()))
+                await pipe.execute()
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Token revocations not restored to Redis: {exc}")
+
+
+async def purge_expired(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Delete the revocations of tokens that have expired, which no longer need to be checked.
+
+    Rows are deleted in batches of `batch_size`, each in its own transaction, to keep locks short.
+
+    Returns
+    -------
+    int
+        The number of rows deleted.
+    """
+    purged = 0
+    while True:
+        query = select(TokenBlacklist.id).where(TokenBlacklist.expires_at <= datetime.now()).limit(batch_size)
+        expired = list((await db.execute(query)).scalars())
+        if expired:
+            await db.execute(delete(TokenBlacklist).where(TokenBlacklist.id.in_(expired)))
+            await db.commit()
+            purged += len(expired)
+        if len(expired) < batch_size:
+            return purged
+
+
+async def purge_periodically(interval: float) -> None:
+    """Purge expired revocations from the database every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with local_session() as db:
+                purged = await purge_expired(db)
+            if purged:
+                logger.info(f"Purged {purged} expired token revocations")
+        except SQLAlchemyError as exc:
+            logger.warning(f"Expired token revocations not purged: {exc}")
+
+
+async def _rebuild_from_database() -> None:
+    try:
+        async with local_session() as db:
+            await rebuild(db)
+    except SQLAlchemyError as exc:
+        logger.warning(f"Token blacklist filter not rebuilt: {exc}")
+
+
+async def listen_for_revocations() -> None:
+    """Subscribe to the revocation channel, adding each revoked token to this worker's Bloom filter.
+
+    This coroutine runs for the lifetime of the application as a background task. `subscribed` is only set
+    while the subscription is up, so tokens are checked against the database until it is. If it drops, it
+    is retried and the filter is rebuilt from the database, since broadcasts may have been missed. The
+    revocations this worker failed to propagate are replayed once Redis answers.
+    """
+    global subscribed
+
+    if client is None:
+        return
+
+    missed = False
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                if missed:
+                    await _rebuild_from_database()
+                    missed = False
+                subscribed = True
+
+                while True:
+                    await _replay_revocations()
+                    # polled with a timeout, since a blocking read would be cut by the command timeout when idle
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        data = message["data"]
+                        _remember(data.decode() if isinstance(data, bytes) else data)
+
+        except asyncio.CancelledError:
+            subscribed = False
+            raise
+
+        except (RedisError, OSError) as exc:
+            subscribed = False
+            logger.warning(f"Token revocation subscription lost, retrying: {exc}")
+            missed = True
+            await asyncio.sleep(1)
+
+
+async def rebuild_periodically(interval: float) -> None:
+    """Rebuild the Bloom filter every `interval` seconds, so expired revocations stop taking room in it."""
+    while True:
+        await asyncio.sleep(interval)
+        await _rebuild_from_database()
@@ -1,56 +1,155 @@
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from collections.abc import Callable
+from typing import Any
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class ClientCacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to set the `Cache-Control` header for client-side caching on all responses.
+from ..core.utils.etag import etag_matches, make_etag
+
+_NOT_MODIFIED_HEADERS = ("cache-control", "etag", "vary")
+
+
+def cache_control(policy: str) -> Callable:
+    """Set the `Cache-Control` header of a route, overriding the policy chosen by `ClientCacheMiddleware`.
 
     Parameters
     ----------
-    app: FastAPI
-        The FastAPI application instance.
+    policy: str
+        The header value, e.g. "no-store" or "private, max-age=0".
+
+    Example
+    -------
+    ```python
+    @router.get("/user/me/")
+    @cache_control("private, no-cache")
+    async def read_users_me(request: Request) -> UserRead:
+        ...
+    ```
+    """
+
+    def wrapper(func: Callable) -> Callable:
+        func.__cache_control__ = policy  # type: ignore[attr-defined]
+        return func
+
+    return wrapper
+
+
+def _route_policy(scope: Scope) -> str | None:
+    endpoint: Any = scope.get("endpoint")
+    return getattr(endpoint, "__cache_control__", None)
+
+
+class ClientCacheMiddleware:
+    """ASGI middleware to set the `Cache-Control` header for client-side caching, with `ETag` validation.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The wrapped ASGI application.
     max_age: int, optional
-        Duration (in seconds) for which the response should be cached. Defaults to 60 seconds.
+        Duration (in seconds) for which public responses should be cached. Defaults to 60 seconds.
 
     Attributes
     ----------
     max_age: int
-        Duration (in seconds) for which the response should be cached.
+        Duration (in seconds) for which public responses should be cached.
 
     Methods
     -------
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        Process the request and set the `Cache-Control` header in the response.
+    def policy(self, scope: Scope, status_code: int) -> str:
+        Choose the `Cache-Control` value of a response.
 
     Note
     ----
-        - The `Cache-Control` header instructs clients (e.g., browsers)
-        to cache the response for the specified duration.
+        - The policy of a route set with `cache_control`, or a `Cache-Control` header set by the endpoint,
+          always wins. Otherwise, responses to methods other than GET and error responses get "no-store",
+          responses to requests carrying an `Authorization` header get "private, no-cache", and the
+          remaining ones get "public, max-age=...".
+        - Headers are edited in the `http.response.start` message, so no task is spawned and the body is
+          not copied. The only exception is a successful GET response without an `ETag` (the `cache`
+          decorator already sets one): when its body arrives in a single message, a strong `ETag` is
+          computed from it, and a match with the request's `If-None-Match` replaces the body by a 304.
+          Streaming responses are passed through as they are produced.
     """
 
-    def __init__(self, app: FastAPI, max_age: int = 60) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, max_age: int = 60) -> None:
+        self.app = app
         self.max_age = max_age
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        """Process the request and set the `Cache-Control` header in the response.
-
-        Parameters
-        ----------
-        request: Request
-            The incoming request.
-        call_next: RequestResponseEndpoint
-            The next middleware or route handler in the processing chain.
-
-        Returns
-        -------
-        Response
-            The response object with the `Cache-Control` header set.
-
-        Note
-        ----
-            - This method is automatically called by Starlette for processing the request-response cycle.
-        """
-        response: Response = await call_next(request)
-        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
-        return response
+    def policy(self, scope: Scope, status_code: int) -> str:
+        route_policy = _route_policy(scope)
+        if route_policy is not None:
+            return route_policy
+
+        if scope["method"] not in ("GET", "HEAD") or status_code >= 400:
+            return "no-store"
+
+        if "authorization" in Headers(scope=scope):
+            return "private, no-cache"
+
+        return f"public, max-age={self.max_age}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start: Message | None = None
+        not_modified = False
+
+        async def send_with_cache_headers(message: Message) -> None:
+            nonlocal start, not_modified
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                policy = headers.get("cache-control") or self.policy(scope, message["status"])
+                headers["Cache-Control"] = policy
+                if "authorization" in request_headers and policy.startswith("private"):
+                    headers.add_vary_header("Authorization")
+
+                if scope["method"] != "GET" or message["status"] != 200 or "no-store" in policy:
+                    await send(message)
+                    return
+
+                etag = headers.get("etag")
+                if etag is None:
+                    start = message
+                    return
+
+                if etag_matches(request_headers.get("if-none-match"), etag):
+                    not_modified = True
+                    await _send_not_modified(send, headers)
+                    return
+
+                await send(message)
+                return
+
+            if not_modified and message["type"] == "http.response.body":
+                return
+
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            pending, start = start, None
+            headers = MutableHeaders(scope=pending)
+            if message.get("more_body", False):
+                await send(pending)
+                await send(message)
+                return
+
+            headers["ETag"] = make_etag(message.get("body", b""))
+            if etag_matches(request_headers.get("if-none-match"), headers["etag"]):
+                await _send_not_modified(send, headers)
+                return
+
+            await send(pending)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
+
+
+async def _send_not_modified(send: Send, headers: MutableHeaders) -> None:
+    raw_headers = [(name, value) for name, value in headers.raw if name.decode("latin-1") in _NOT_MODIFIED_HEADERS]
+    await send({"type": "http.response.start", "status": 304, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,134 @@
+from collections.abc import Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.utils.cache_codecs import Compressor, get_content_codecs, negotiate_content_encoding
+from ..core.utils.etag import variant_etag
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies with the best content coding accepted by the client.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The wrapped ASGI application.
+    minimum_size: int, optional
+        Bodies smaller than this many bytes are sent uncompressed. Defaults to 1024.
+    encodings: Sequence[str], optional
+        The content codings to offer, most preferred first (see `cache_codecs`). Codings whose codec is not
+        installed are ignored. Defaults to ("gzip",).
+    streaming: bool, optional
+        Whether responses whose body is sent in several messages are compressed incrementally. When False
+        they are sent as they are. Defaults to True.
+
+    Note
+    ----
+        - Responses that already have a `Content-Encoding`, or whose `Cache-Control` contains "no-transform",
+          are left untouched. Compressed responses get "Vary: Accept-Encoding", and their `ETag`, if any,
+          is suffixed with the content coding, since the bytes differ from the uncompressed ones.
+        - When the `cache` decorator served a body it had stored compressed, the stored bytes are sent if
+          the client accepts their coding, instead of compressing the body again on every hit.
+        - Add it before `ClientCacheMiddleware`, so `ETag` validation applies to the compressed bytes.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, encodings: Sequence[str] = ("gzip",), streaming: bool = True
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = get_content_codecs(encodings)
+        self.streaming = streaming
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        encoding = negotiate_content_encoding(accept_encoding, list(self.codecs))
+        start: Message | None = None
+        compressor: Compressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if (
+                    message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                ):
+                    await send(message)
+                    return
+
+                start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = compressor.compress(body)
+                if not more_body:
+                    data += compressor.flush()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            pending, start = start, None
+            if not more_body and len(body) < self.minimum_size:
+                await send(pending)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=pending)
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if not more_body:
+                chosen, compressed = self._cached_variant(scope, etag, accept_encoding)
+                if chosen is None and encoding is not None:
+                    chosen, compressed = encoding, self.codecs[encoding].compress(body)
+                if chosen is not None:
+                    headers["Content-Encoding"] = chosen
+                    headers["Content-Length"] = str(len(compressed))
+                    if etag is not None:
+                        headers["ETag"] = variant_etag(etag, chosen)
+                    message = {"type": "http.response.body", "body": compressed}
+
+                await send(pending)
+                await send(message)
+                return
+
+            if encoding is None or not self.streaming:
+                await send(pending)
+                await send(message)
+                return
+
+            compressor = self.codecs[encoding].compressor()
+            headers["Content-Encoding"] = encoding
+            del headers["Content-Length"]
+            if etag is not None:
+                headers["ETag"] = variant_etag(etag, encoding)
+            await send(pending)
+            await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _cached_variant(scope: Scope, etag: str | None, accept_encoding: str | None) -> tuple[str | None, bytes]:
+        cached = scope.get("state", {}).get("compressed_variants")
+        if etag is None or cached is None or cached[0] != etag:
+            return None, b""
+
+        variants = cached[1]
+        chosen = negotiate_content_encoding(accept_encoding, list(variants))
+        return chosen, variants[chosen] if chosen is not None else b""
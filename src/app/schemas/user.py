@@ -30,6 +30,10 @@ class UserRead(BaseModel):
     role_id: int | None
 
 
+class UserPrincipal(UserRead):
+    is_superuser: bool
+
+
 class UserCreate(UserBase):
     model_config = ConfigDict(extra="forbid")    
     
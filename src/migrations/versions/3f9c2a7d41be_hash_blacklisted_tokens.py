@@ -0,0 +1,84 @@
+"""Store a hash of blacklisted tokens instead of the whole token
+
+Revision ID: 3f9c2a7d41be
+Revises:
+Create Date: 2026-10-18 10:12:31.482915
+
+"""
+import hashlib
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+# first revision: earlier releases created their tables with `create_all` and had no migrations
+revision: str = '3f9c2a7d41be'
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 1000
+
+
+def _columns() -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("token_blacklist"):
+        return set()
+    return {column["name"] for column in inspector.get_columns("token_blacklist")}
+
+
+def upgrade() -> None:
+    # on a fresh database, or one created by `create_all` on a recent release, the table is created with
+    # the new layout at startup, or already has it
+    columns = _columns()
+    if not columns or "token_hash" in columns:
+        return
+
+    connection = op.get_bind()
+    token_blacklist = sa.table(
+        "token_blacklist",
+        sa.column("id", sa.Integer),
+        sa.column("token", sa.String),
+        sa.column("token_hash", sa.String),
+        sa.column("expires_at", sa.DateTime),
+    )
+
+    op.execute(token_blacklist.delete().where(token_blacklist.c.expires_at <= sa.func.now()))
+    op.add_column("token_blacklist", sa.Column("token_hash", sa.String(length=64), nullable=True))
+
+    # hashed in Python, so the values match `hash_token` whatever the database
+    while True:
+        rows = connection.execute(
+            sa.select(token_blacklist.c.id, token_blacklist.c.token)
+            .where(token_blacklist.c.token_hash.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        for row_id, token in rows:
+            connection.execute(
+                token_blacklist.update()
+                .where(token_blacklist.c.id == row_id)
+                .values(token_hash=hashlib.sha256(token.encode()).hexdigest())
+            )
+        if len(rows) < BATCH_SIZE:
+            break
+
+    op.alter_column("token_blacklist", "token_hash", nullable=False)
+    op.drop_index("ix_token_blacklist_token", table_name="token_blacklist")
+    op.drop_column("token_blacklist", "token")
+    op.create_index("ix_token_blacklist_token_hash", "token_blacklist", ["token_hash"], unique=True)
+    op.create_index("ix_token_blacklist_expires_at", "token_blacklist", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    # the upgrade leaves a database without the table, or already on the old layout, as it is
+    if "token_hash" not in _columns():
+        return
+
+    # tokens cannot be recovered from their hash, so the revocations are dropped
+    op.drop_index("ix_token_blacklist_expires_at", table_name="token_blacklist")
+    op.drop_index("ix_token_blacklist_token_hash", table_name="token_blacklist")
+    op.execute("DELETE FROM token_blacklist")
+    op.drop_column("token_blacklist", "token_hash")
+    op.add_column("token_blacklist", sa.Column("token", sa.String(), nullable=False))
+    op.create_index("ix_token_blacklist_token", "token_blacklist", ["token"], unique=True)
@@ -1,5 +1,10 @@
+import asyncio
+import importlib.util
+from collections import deque
+from types import ModuleType
 from typing import Any, Callable, Generator
 
+import fakeredis
 import pytest
 from faker import Faker
 from fastapi.testclient import TestClient
@@ -8,6 +13,10 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
 
 from src.app.core.config import settings
+from src.app.core.utils import cache
+from src.app.core.utils.cache_backends import MemoryBackend, RedisBackend
+from src.app.core.utils.circuit_breaker import CircuitBreaker
+from src.app.core.utils.local_cache import LocalCache
 from src.app.main import app
 
 DATABASE_URI = settings.POSTGRES_URI
@@ -37,3 +46,69 @@ def db() -> Generator[Session, Any, None]:
 
 def override_dependency(dependency: Callable[..., Any], mocked_response: Any) -> None:
     app.dependency_overrides[dependency] = lambda: mocked_response
+
+
+class FlakyBackend(MemoryBackend):
+    """A `MemoryBackend` whose operations listed in `failing` raise, like a Redis connection that dropped."""
+
+    errors = (OSError,)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.failing: set[str] = set()
+
+    def _check(self, operation: str) -> None:
+        if operation in self.failing:
+            raise OSError(f"{operation} failed")
+
+    async def ping(self) -> None:
+        self._check("ping")
+
+    async def get(self, key: str) -> bytes | None:
+        self._check("get")
+        return await super().get(key)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        self._check("release_lock")
+        await super().release_lock(key, token)
+
+
+@pytest.fixture
+def cache_backend(monkeypatch: pytest.MonkeyPatch) -> FlakyBackend:
+    backend = FlakyBackend()
+    monkeypatch.setattr(cache, "backend", backend)
+    monkeypatch.setattr(cache, "local_cache", None)
+    monkeypatch.setattr(cache, "circuit_breaker", CircuitBreaker(failure_threshold=2))
+    monkeypatch.setattr(cache, "pending_invalidations", deque(maxlen=100))
+    monkeypatch.setattr(cache, "namespace_generations", {})
+    monkeypatch.setattr(cache, "subscribed", False)
+    return backend
+
+
+@pytest.fixture
+def redis_server(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeServer:
+    """Give the cache a Redis backend and an in-process tier, on a fake Redis server other workers can share."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(cache, "backend", RedisBackend(fakeredis.FakeAsyncRedis(server=server)))
+    monkeypatch.setattr(cache, "local_cache", LocalCache())
+    monkeypatch.setattr(cache, "circuit_breaker", CircuitBreaker())
+    monkeypatch.setattr(cache, "pending_invalidations", deque(maxlen=100))
+    monkeypatch.setattr(cache, "namespace_generations", {})
+    monkeypatch.setattr(cache, "subscribed", False)
+    return server
+
+
+def load_cache_worker(server: fakeredis.FakeServer) -> ModuleType:
+    """Load another copy of the cache module, standing in for a second worker sharing the Redis `server`."""
+    spec = importlib.util.spec_from_file_location(f"{cache.__name__}_worker", cache.__file__)
+    worker = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(worker)  # type: ignore[union-attr]
+    worker.backend = RedisBackend(fakeredis.FakeAsyncRedis(server=server))
+    worker.local_cache = LocalCache()
+    return worker
+
+
+async def wait_until(condition: Callable[[], bool]) -> None:
+    async with asyncio.timeout(5):
+        while not condition():
+            await asyncio.sleep(0.01)
@@ -1,3 +1,4 @@
+import asyncio
 import uuid as uuid_pkg
 
 from sqlalchemy.orm import Session
@@ -12,7 +13,7 @@ def create_user(db: Session, is_super_user: bool = False) -> models.User:
         name=fake.name(),
         username=fake.user_name(),
         email=fake.email(),
-        hashed_password=get_password_hash(fake.password()),
+        hashed_password=asyncio.run(get_password_hash(fake.password())),
         profile_image_url=fake.image_url(),
         uuid=uuid_pkg.uuid4(),
         is_superuser=is_super_user,
@@ -0,0 +1,292 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Annotated, Any
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from src.app.api.dependencies import get_current_user, requires_permission
+from src.app.api.v1 import users
+from src.app.core import security, setup
+from src.app.core.db.database import DATABASE_URL, async_get_db
+from src.app.core.db.token_blacklist import TokenBlacklist
+from src.app.core.security import create_access_token
+from src.app.core.utils import cache, cache_metrics, password_hashing, rbac, token_blacklist
+from src.app.core.utils.bloom_filter import BloomFilter
+from src.app.crud.crud_users import crud_users
+from src.app.schemas.user import UserRoleUpdate, UserUpdate
+from tests.conftest import FlakyBackend, load_cache_worker, wait_until
+
+
+class CountingSession:
+    """Stands in for an `AsyncSession`, answering the authentication queries and counting them."""
+
+    def __init__(self, user: dict[str, Any]) -> None:
+        self.user = user
+        self.queries: list[str] = []
+
+    async def execute(self, statement: Any) -> SimpleNamespace:
+        query = str(statement)
+        self.queries.append(query)
+        if "token_blacklist" in query:
+            row = None
+        elif "role_permission" in query:
+            row = (1,)
+        else:
+            row = SimpleNamespace(_mapping=self.user)
+        return SimpleNamespace(first=lambda: row, one_or_none=lambda: row)
+
+
+USER = {
+    "id": 1,
+    "name": "User Userson",
+    "username": "userson",
+    "email": "user.userson@example.com",
+    "profile_image_url": "https://www.profileimageurl.com",
+    "role_id": 1,
+    "is_superuser": False,
+}
+
+
+def test_protected_request_resolves_the_user_once() -> None:
+    user = USER
+    session = CountingSession(user)
+
+    app = FastAPI()
+    app.dependency_overrides[async_get_db] = lambda: session
+
+    @app.post("/product", dependencies=[Depends(requires_permission("product.create"))])
+    async def write_product(current_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+        return current_user
+
+    token = asyncio.run(create_access_token(data={"sub": user["username"], "role_id": user["role_id"]}))
+    response = TestClient(app).post("/product", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == user["username"]
+
+    # one revocation check, one user lookup and one permission check, without cache
+    assert len(session.queries) == 3
+    assert sum("token_blacklist" in query for query in session.queries) == 1
+
+
+def test_password_hash_cost_change_requires_rehash() -> None:
+    with patch.object(security, "BCRYPT_ROUNDS", 4):
+        hashed_password = asyncio.run(security.get_password_hash("password"))
+        assert asyncio.run(security.verify_password("password", hashed_password))
+        assert not security.password_needs_rehash(hashed_password)
+
+    with patch.object(security, "BCRYPT_ROUNDS", 5):
+        assert security.password_needs_rehash(hashed_password)
+
+
+def test_password_hashing_latencies_are_kept_apart_from_cache_metrics() -> None:
+    password_hashing.metrics.reset()
+    with patch.object(security, "BCRYPT_ROUNDS", 4):
+        asyncio.run(security.get_password_hash("password"))
+
+    latencies = password_hashing.metrics.snapshot()["latencies"]
+    assert latencies["hash"]["count"] == latencies["queue"]["count"] == 1
+    assert "password_hashing" not in cache_metrics.metrics.snapshot()["latencies"]
+
+
+class FlakyRedis:
+    """Stands in for the blacklist's Redis client, recording what it publishes and failing while `down`."""
+
+    def __init__(self) -> None:
+        self.down = False
+        self.published: list[str] = []
+
+    async def set(self, *args: Any, **kwargs: Any) -> None:
+        if self.down:
+            raise RedisConnectionError("Connection refused")
+
+    async def publish(self, channel: str, message: str) -> None:
+        if self.down:
+            raise RedisConnectionError("Connection refused")
+        self.published.append(message)
+
+
+def test_revocation_is_checked_in_the_database_while_the_subscription_is_down() -> None:
+    with (
+        patch.object(token_blacklist, "bloom", BloomFilter(capacity=100, error_rate=0.01)),
+        patch.object(token_blacklist, "client", FlakyRedis()),
+    ):
+        with patch.object(token_blacklist, "subscribed", False):
+            assert asyncio.run(token_blacklist.is_revoked("unknown")) is None
+
+        with patch.object(token_blacklist, "subscribed", True):
+            assert asyncio.run(token_blacklist.is_revoked("unknown")) is False
+
+
+def test_revocation_not_broadcast_is_replayed_once_redis_answers() -> None:
+    redis = FlakyRedis()
+    redis.down = True
+    expires_at = datetime.now() + timedelta(minutes=15)
+    with (
+        patch.object(token_blacklist, "bloom", BloomFilter(capacity=100, error_rate=0.01)),
+        patch.object(token_blacklist, "client", redis),
+        patch.object(token_blacklist, "pending_revocations", deque()),
+    ):
+        asyncio.run(token_blacklist.revoke("revoked", expires_at))
+        assert list(token_blacklist.pending_revocations) == [("revoked", expires_at)]
+
+        redis.down = False
+        asyncio.run(token_blacklist._replay_revocations())
+        assert redis.published == ["revoked"]
+        assert not token_blacklist.pending_revocations
+
+
+def _revocation(expires_at: datetime) -> TokenBlacklist:
+    return TokenBlacklist(token_hash=token_blacklist.hash_token(str(uuid4())), expires_at=expires_at)
+
+
+def test_expired_revocations_are_purged_in_batches(db: Session) -> None:
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    now = datetime.now()
+
+    async def purge(batch_size: int) -> tuple[int, int]:
+        async with AsyncSession(engine) as session:
+            with patch.object(session, "commit", wraps=session.commit) as commit:
+                purged = await token_blacklist.purge_expired(session, batch_size=batch_size)
+        return purged, commit.call_count
+
+    # revocations expired by earlier runs are purged first, so only this test's rows are counted
+    asyncio.run(purge(batch_size=1000))
+    expired = [_revocation(now - timedelta(minutes=1)) for _ in range(5)]
+    valid = [_revocation(now + timedelta(minutes=15)) for _ in range(2)]
+    expired_hashes, valid_hashes = {row.token_hash for row in expired}, {row.token_hash for row in valid}
+    db.add_all(expired + valid)
+    db.commit()
+
+    # two full batches and a last one of a single row, each committed
+    assert asyncio.run(purge(batch_size=2)) == (5, 3)
+    remaining = set(db.scalars(select(TokenBlacklist.token_hash)))
+    assert not remaining & expired_hashes
+    assert valid_hashes <= remaining
+
+    db.execute(delete(TokenBlacklist).where(TokenBlacklist.token_hash.in_(valid_hashes)))
+    db.commit()
+
+
+def test_closing_the_token_blacklist_leaves_other_background_tasks_running() -> None:
+    async def scenario() -> None:
+        cache_task = asyncio.create_task(asyncio.sleep(60))
+        blacklist_task = asyncio.create_task(asyncio.sleep(60))
+        with (
+            patch.object(setup, "cache_tasks", {cache_task}),
+            patch.object(setup, "token_blacklist_tasks", {blacklist_task}),
+            patch.object(token_blacklist, "client", None),
+        ):
+            await setup.close_token_blacklist()
+
+        assert blacklist_task.cancelled()
+        assert not cache_task.done()
+        cache_task.cancel()
+
+    asyncio.run(scenario())
+
+
+USER_WRITES = {
+    "update": lambda request: users.patch_user(request, UserUpdate(name="User Renamed"), "userson", USER, None),
+    "delete": lambda request: users.erase_user(request, "userson", USER, None, token="token"),
+    "db_delete": lambda request: users.erase_db_user(request, "userson", None, token="token"),
+    "role": lambda request: users.patch_user_role(request, "userson", UserRoleUpdate(role_id=2), None),
+}
+
+
+@pytest.mark.parametrize("write", list(USER_WRITES))
+def test_user_writes_evict_the_cached_principal(cache_backend: FlakyBackend, write: str) -> None:
+    request = Request({"type": "http", "method": "PATCH", "path": "/", "query_string": b"", "headers": []})
+    principal_keys = ["principal:userson", "principal:user.userson@example.com"]
+
+    async def scenario() -> None:
+        for key in principal_keys:
+            await cache.get_or_load(key, AsyncMock(return_value=USER), expiration=60)
+            assert await cache_backend.get(key) is not None
+
+        with (
+            patch.object(crud_users, "get", AsyncMock(return_value=USER)),
+            patch.object(crud_users, "exists", AsyncMock(return_value=False)),
+            patch.object(crud_users, "update", AsyncMock()),
+            patch.object(crud_users, "delete", AsyncMock()),
+            patch.object(crud_users, "db_delete", AsyncMock()),
+            patch.object(users.crud_roles, "get", AsyncMock(return_value={"id": 2})),
+            patch.object(users, "blacklist_token", AsyncMock()),
+        ):
+            await USER_WRITES[write](request)
+
+        for key in principal_keys:
+            assert await cache_backend.get(key) is None
+
+    asyncio.run(scenario())
+
+
+class SnapshotSession:
+    """Stands in for an `AsyncSession`, answering the role to permissions query from `grants`."""
+
+    def __init__(self, grants: list[tuple[int, str]]) -> None:
+        self.grants = grants
+        self.loads = 0
+
+    async def execute(self, statement: Any) -> SimpleNamespace:
+        self.loads += 1
+        return SimpleNamespace(tuples=lambda: list(self.grants))
+
+
+def test_rbac_snapshot_is_reloaded_after_bump_version(
+    cache_backend: FlakyBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(rbac, "snapshot", {})
+    monkeypatch.setattr(rbac, "snapshot_generation", None)
+    session = SnapshotSession([(1, "product.create")])
+
+    async def scenario() -> None:
+        await rbac.preload(session)  # type: ignore[arg-type]
+        assert await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+        assert await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+        assert session.loads == 1
+
+        session.grants = []
+        await rbac.bump_version()
+        assert not await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+        assert session.loads == 2
+
+    asyncio.run(scenario())
+
+
+def test_rbac_bump_missed_while_disconnected_still_reloads_the_snapshot(redis_server: fakeredis.FakeServer) -> None:
+    session = SnapshotSession([(1, "product.create")])
+
+    async def scenario() -> None:
+        listener = asyncio.create_task(cache.listen_for_invalidations())
+        await wait_until(lambda: cache.subscribed)
+        await rbac.preload(session)  # type: ignore[arg-type]
+        assert await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+
+        redis_server.connected = False
+        await wait_until(lambda: not cache.subscribed)
+        redis_server.connected = True
+        assert await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+
+        # another worker revokes the permission before this one has subscribed again
+        session.grants = []
+        await load_cache_worker(redis_server).invalidate([], namespaces=[rbac.NAMESPACE])
+        assert not await rbac.has_permission(session, 1, "product.create")  # type: ignore[arg-type]
+        assert session.loads == 2
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+    with patch.object(rbac, "snapshot", {}), patch.object(rbac, "snapshot_generation", None):
+        asyncio.run(scenario())
@@ -0,0 +1,528 @@
+import asyncio
+import inspect
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pytest
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.app.api.v1 import products
+from src.app.core.exceptions.cache_exceptions import CacheIdentificationInferenceError, CacheKeyTemplateError
+from src.app.core.utils import cache as cache_module
+from src.app.core.utils.bloom_filter import BloomFilter
+from src.app.core.utils.cache import CachedResponse, _compile_key_builder, _decode_entry, _encode_entry
+from src.app.core.utils.cache_backends import CacheBackend, MemoryBackend, SqliteBackend
+from src.app.core.utils.cache_codecs import negotiate_content_encoding
+from src.app.core.utils.cache_metrics import HotKeyTracker
+from src.app.core.utils.circuit_breaker import CircuitBreaker
+from src.app.core.utils.etag import etag_matches, make_etag, variant_etag
+from src.app.core.utils.local_cache import LocalCache
+from src.app.middleware.client_cache_middleware import ClientCacheMiddleware
+from src.app.schemas.product import ProductCreate
+from tests.conftest import FlakyBackend, load_cache_worker, wait_until
+
+
+def test_local_cache_evicts_least_recently_used() -> None:
+    local_cache = LocalCache(max_entries=2)
+    local_cache.set("a", 1, size=1, ttl=60)
+    local_cache.set("b", 2, size=1, ttl=60)
+    assert local_cache.get("a") == 1
+
+    local_cache.set("c", 3, size=1, ttl=60)
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == 1
+    assert local_cache.get("c") == 3
+
+
+def test_local_cache_respects_byte_cap() -> None:
+    local_cache = LocalCache(max_bytes=10)
+    local_cache.set("a", "x", size=6, ttl=60)
+    local_cache.set("b", "y", size=6, ttl=60)
+    assert local_cache.get("a") is None
+    assert local_cache.current_bytes == 6
+
+    local_cache.set("too_big", "z", size=11, ttl=60)
+    assert local_cache.get("too_big") is None
+
+
+def test_local_cache_expires_entries() -> None:
+    local_cache = LocalCache()
+    with patch("src.app.core.utils.local_cache.time.monotonic", return_value=100.0):
+        local_cache.set("a", 1, size=1, ttl=5)
+
+    with patch("src.app.core.utils.local_cache.time.monotonic", return_value=106.0):
+        assert local_cache.get("a") is None
+    assert local_cache.current_bytes == 0
+
+
+def test_local_cache_delete_pattern() -> None:
+    local_cache = LocalCache()
+    local_cache.set("products:items_per_page_10:page:1", 1, size=1, ttl=60)
+    local_cache.set("product_cache:1", 2, size=1, ttl=60)
+
+    local_cache.delete_pattern("products:*")
+    assert local_cache.get("products:items_per_page_10:page:1") is None
+    assert local_cache.get("product_cache:1") == 2
+
+
+def test_cached_response_entry_round_trip() -> None:
+    entry = CachedResponse(body=b'{"id":1}', status_code=200, headers={"content-type": "application/json"})
+    assert _decode_entry(_encode_entry(entry)) == entry
+
+
+def test_large_entries_are_compressed() -> None:
+    body = b'{"description":"' + b"a" * 63206 + b'"}'
+    entry = CachedResponse(body=body, status_code=200, headers={"content-type": "application/json"})
+
+    encoded = _encode_entry(entry, "zlib")
+    assert len(encoded) < len(body) // 10
+
+    decoded = _decode_entry(encoded)
+    assert decoded == entry._replace(variants=decoded.variants)
+    assert zlib.decompress(decoded.variants["deflate"]) == body
+
+
+def test_legacy_json_entry_decodes_as_body() -> None:
+    entry = _decode_entry(b'{"id": 1}')
+    assert entry.body == b'{"id": 1}'
+    assert entry.headers["content-type"] == "application/json"
+
+
+def _read_products(request: object, page: int = 1, items_per_page: int = 10) -> None:
+    ...
+
+
+def test_key_builder_formats_template_and_resource_id() -> None:
+    parameters = inspect.signature(_read_products).parameters
+    build_key = _compile_key_builder(parameters, "products:items_per_page_{items_per_page}:page", "page", int)
+    assert build_key({"page": 2, "items_per_page": 10}) == "products:items_per_page_10:page:2"
+
+
+def test_key_builder_rejects_unknown_parameters() -> None:
+    parameters = inspect.signature(_read_products).parameters
+    with pytest.raises(CacheKeyTemplateError):
+        _compile_key_builder(parameters, "products:{category_id}", "page", int)
+
+    with pytest.raises(CacheIdentificationInferenceError):
+        _compile_key_builder(parameters, "products", None, int)
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "disk"])
+def test_local_backends_discard_fills_raced_by_invalidations(backend_name: str, tmp_path: Path) -> None:
+    async def scenario(backend: CacheBackend) -> None:
+        fences = dict(zip(["item:1", "cache_tag:items"], await backend.read_fences(["item:1", "cache_tag:items"])))
+        assert await backend.fenced_set("item:1", b"old", 60, fences, ["cache_tag:items"])
+        assert await backend.get("item:1") == b"old"
+
+        await backend.delete(["item:1"])
+        assert not await backend.fenced_set("item:1", b"stale", 60, fences, [])
+        assert await backend.get("item:1") is None
+
+        fences = dict(zip(["item:1"], await backend.read_fences(["item:1"])))
+        assert await backend.fenced_set("item:1", b"new", 60, fences, ["cache_tag:items"])
+        assert await backend.invalidate_tag("cache_tag:items") == ["item:1"]
+        assert await backend.get("item:1") is None
+        await backend.close()
+
+    backend = MemoryBackend() if backend_name == "memory" else SqliteBackend(str(tmp_path / "cache.sqlite3"))
+    asyncio.run(scenario(backend))
+
+
+def test_memory_backend_purges_expired_fences() -> None:
+    backend = MemoryBackend(fence_ttl=10)
+    with patch("src.app.core.utils.cache_backends.time.monotonic", return_value=0.0):
+        asyncio.run(backend.delete(["item:1", "item:2"]))
+
+    with patch("src.app.core.utils.cache_backends.time.monotonic", return_value=11.0):
+        asyncio.run(backend.delete(["item:3"]))
+    assert list(backend.fences) == ["item:3"]
+
+
+def test_cache_backend_requires_every_operation() -> None:
+    class PartialBackend(CacheBackend):
+        async def get(self, key: str) -> bytes | None:
+            return None
+
+    with pytest.raises(TypeError):
+        PartialBackend()  # type: ignore[abstract]
+
+
+def test_circuit_breaker_opens_and_allows_a_single_probe() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    with patch("src.app.core.utils.circuit_breaker.time.monotonic", return_value=breaker.opened_at + 31):
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+
+    assert breaker.state == "closed"
+
+
+def test_hot_key_tracker_keeps_the_most_looked_up_keys() -> None:
+    tracker = HotKeyTracker(top_k=2, width=64, depth=4)
+    for _ in range(10):
+        tracker.record("product_cache:1", hit=True)
+    for _ in range(5):
+        tracker.record("product_cache:2", hit=False)
+    for number in range(3, 30):
+        tracker.record(f"product_cache:{number}", hit=True)
+
+    snapshot = tracker.snapshot()
+    assert [hot_key["key"] for hot_key in snapshot] == ["product_cache:1", "product_cache:2"]
+    assert snapshot[0]["estimate"] >= 10
+    assert snapshot[1]["hits"] == 0
+
+    tracker.decay()
+    assert tracker.snapshot()[0]["lookups"] == 5
+
+
+def test_etag_matches_uses_weak_comparison() -> None:
+    etag = make_etag(b"{}")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_content_encoding_negotiation_honours_quality_values() -> None:
+    assert negotiate_content_encoding("gzip;q=0.5, deflate", ["gzip", "deflate"]) == "deflate"
+    assert negotiate_content_encoding("gzip, deflate", ["gzip", "deflate"]) == "gzip"
+    assert negotiate_content_encoding("*, gzip;q=0", ["gzip", "deflate"]) == "deflate"
+    assert negotiate_content_encoding("identity", ["gzip"]) is None
+    assert negotiate_content_encoding(None, ["gzip"]) is None
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"revoked:{i}")
+
+    assert all(f"revoked:{i}" in bloom for i in range(1000))
+    assert sum(f"valid:{i}" in bloom for i in range(10000)) < 300
+
+
+def _request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [(name.encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "query_string": b"", "headers": raw_headers})
+
+
+def _counting_endpoint(calls: list[int], **cache_kwargs: Any) -> Any:
+    @cache_module.cache("item", resource_id_name="item_id", **cache_kwargs)
+    async def read_item(request: Request, item_id: int) -> dict[str, int]:
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        return {"id": item_id, "version": len(calls)}
+
+    return read_item
+
+
+def test_circuit_breaker_resets_after_a_successful_backend_call(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+    read_item = _counting_endpoint(calls)
+
+    async def scenario() -> None:
+        cache_backend.failing = {"get"}
+        await read_item(_request(), item_id=1)
+        cache_backend.failing = set()
+        await read_item(_request(), item_id=1)
+        cache_backend.failing = {"get"}
+        await read_item(_request(), item_id=1)
+
+    asyncio.run(scenario())
+    # two failures, but not consecutive ones
+    assert cache_module.circuit_breaker.state == "closed"
+
+
+def test_cancelled_probe_lets_a_later_request_probe(cache_backend: FlakyBackend) -> None:
+    breaker = cache_module.circuit_breaker
+    breaker.record_failure()
+    breaker.record_failure()
+
+    async def scenario() -> None:
+        hanging = asyncio.Event()
+
+        async def ping() -> None:
+            await hanging.wait()
+
+        with patch.object(cache_backend, "ping", ping):
+            probe = asyncio.create_task(cache_module._backend_available())
+            await asyncio.sleep(0)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+        assert await cache_module._backend_available()
+
+    with patch("src.app.core.utils.circuit_breaker.time.monotonic", return_value=breaker.opened_at + 31):
+        asyncio.run(scenario())
+    assert breaker.state == "closed"
+
+
+def test_backend_error_after_the_endpoint_ran_does_not_call_it_again(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+    read_item = _counting_endpoint(calls)
+    cache_backend.failing = {"release_lock"}
+
+    response = asyncio.run(read_item(_request(), item_id=1))
+    assert response.status_code == 200
+    assert calls == [1]
+
+
+def test_not_modified_from_the_cache_keeps_the_vary_header(cache_backend: FlakyBackend) -> None:
+    @cache_module.cache("page", resource_id_name="page_id", codec="gzip")
+    async def read_page(request: Request, page_id: int) -> Response:
+        body = b"x" * 4096 if page_id == 1 else b"{}"
+        return Response(body, media_type="application/json", headers={"Vary": "Accept-Language"})
+
+    async def scenario() -> None:
+        compressed = await read_page(_request(), page_id=1)
+        etag = compressed.headers["etag"]
+        not_modified = await read_page(_request(headers={"if-none-match": variant_etag(etag, "gzip")}), page_id=1)
+        assert not_modified.status_code == 304
+        assert not_modified.headers["vary"] == "Accept-Language, Accept-Encoding"
+
+        small = await read_page(_request(), page_id=2)
+        not_modified = await read_page(_request(headers={"if-none-match": small.headers["etag"]}), page_id=2)
+        assert not_modified.status_code == 304
+        assert not_modified.headers["vary"] == "Accept-Language"
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_call_the_endpoint_once(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+    read_item = _counting_endpoint(calls)
+
+    async def scenario() -> list[Any]:
+        return await asyncio.gather(*(read_item(_request(), item_id=1) for _ in range(10)))
+
+    responses = asyncio.run(scenario())
+    assert calls == [1]
+    assert {response.body for response in responses} == {b'{"id":1,"version":1}'}
+
+
+def test_lock_follower_waits_for_the_value_or_the_lock_timeout(
+    cache_backend: FlakyBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cache_module, "lock_timeout", 0.1)
+    monkeypatch.setattr(cache_module, "lock_poll_interval", 0.01)
+    calls: list[int] = []
+    read_item = _counting_endpoint(calls)
+
+    async def fill_later() -> None:
+        await asyncio.sleep(0.03)
+        entry = CachedResponse(body=b'{"id":2,"version":0}', status_code=200, headers={})
+        await cache_backend.fenced_set("item:2", _encode_entry(entry), 60, {}, [])
+
+    async def scenario() -> tuple[Any, Any]:
+        # another worker holds the lock and never fills the entry
+        await cache_backend.acquire_lock("lock:item:1", "other-worker", 10)
+        timed_out = await read_item(_request(), item_id=1)
+
+        # another worker holds the lock and fills the entry while this one waits
+        await cache_backend.acquire_lock("lock:item:2", "other-worker", 10)
+        filler = asyncio.create_task(fill_later())
+        filled = await read_item(_request(), item_id=2)
+        await filler
+        return timed_out, filled
+
+    timed_out, filled = asyncio.run(scenario())
+    assert timed_out.status_code == 200
+    assert filled.body == b'{"id":2,"version":0}'
+    assert calls == [1]
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+    # with no fresh period, every entry is stale as soon as it is stored
+    read_item = _counting_endpoint(calls, expiration=0, stale_ttl=60)
+
+    async def scenario() -> tuple[list[Any], Any]:
+        await read_item(_request(), item_id=1)
+        stale = await asyncio.gather(*(read_item(_request(), item_id=1) for _ in range(5)))
+        await asyncio.gather(*cache_module._refresh_tasks)
+        refreshed = await read_item(_request(), item_id=1)
+        await asyncio.gather(*cache_module._refresh_tasks)
+        return stale, refreshed
+
+    stale, refreshed = asyncio.run(scenario())
+    assert {response.body for response in stale} == {b'{"id":1,"version":1}'}
+    assert refreshed.body == b'{"id":1,"version":2}'
+    assert calls == [1, 1, 1]
+
+
+def test_not_found_is_cached_until_the_resource_is_created(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+    existing: set[int] = set()
+
+    @cache_module.cache("item", resource_id_name="item_id", negative_expiration=30)
+    async def read_item(request: Request, item_id: int) -> dict[str, int]:
+        calls.append(item_id)
+        if item_id not in existing:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return {"id": item_id}
+
+    async def scenario() -> list[Any]:
+        responses = [await read_item(_request(), item_id=1) for _ in range(2)]
+        # what a creating endpoint does, e.g. `write_product`
+        existing.add(1)
+        await cache_module.invalidate(["item:1"])
+        responses.append(await read_item(_request(), item_id=1))
+        return responses
+
+    missing, cached_missing, created = asyncio.run(scenario())
+    assert missing.status_code == cached_missing.status_code == 404
+    assert cached_missing.body == b'{"detail":"Item not found"}'
+    assert created.status_code == 200
+    assert calls == [1, 1]
+
+
+def test_namespace_bump_invalidates_every_page(cache_backend: FlakyBackend) -> None:
+    calls: list[int] = []
+
+    @cache_module.cache("items:page", resource_id_name="page", namespace="items")
+    async def read_items(request: Request, page: int) -> dict[str, int]:
+        calls.append(page)
+        return {"page": page, "version": len(calls)}
+
+    @cache_module.cache("item", resource_id_name="item_id", namespaces_to_invalidate=["items"])
+    async def write_item(request: Request, item_id: int) -> None:
+        return None
+
+    async def scenario() -> Any:
+        for _ in range(2):
+            for page in (1, 2):
+                await read_items(_request(), page=page)
+        generation = await cache_module.namespace_generation("items")
+
+        await write_item(_request("POST"), item_id=1)
+        assert await cache_module.namespace_generation("items") == generation + 1  # type: ignore[operator]
+        return await read_items(_request(), page=1)
+
+    response = asyncio.run(scenario())
+    assert response.body == b'{"page":1,"version":3}'
+    assert calls == [1, 2, 1]
+
+
+@pytest.mark.parametrize("invalidation", [{"keys": ["item:1"]}, {"keys": [], "tags": ["items"]}])
+def test_fill_raced_by_an_invalidation_is_not_stored(cache_backend: FlakyBackend, invalidation: dict) -> None:
+    calls: list[int] = []
+
+    @cache_module.cache("item", resource_id_name="item_id", tags=["items"])
+    async def read_item(request: Request, item_id: int) -> dict[str, int]:
+        calls.append(item_id)
+        if len(calls) == 1:
+            # a write lands after the endpoint read the database, before the fill is stored
+            await cache_module.invalidate(**invalidation)
+        return {"id": item_id, "version": len(calls)}
+
+    async def scenario() -> list[Any]:
+        return [await read_item(_request(), item_id=1) for _ in range(3)]
+
+    raced, recomputed, cached = asyncio.run(scenario())
+    assert raced.body == b'{"id":1,"version":1}'
+    assert recomputed.body == cached.body == b'{"id":1,"version":2}'
+    assert calls == [1, 1]
+
+
+def test_client_cache_middleware_sets_cache_control_on_streamed_and_error_responses() -> None:
+    app = FastAPI()
+    app.add_middleware(ClientCacheMiddleware, max_age=30)
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks() -> Any:
+            for chunk in (b"first,", b"second"):
+                yield chunk
+
+        return StreamingResponse(chunks())
+
+    @app.get("/missing")
+    async def missing() -> None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    client = TestClient(app)
+    streamed = client.get("/stream")
+    assert streamed.content == b"first,second"
+    assert streamed.headers["cache-control"] == "public, max-age=30"
+    assert "etag" not in streamed.headers
+
+    error = client.get("/missing", headers={"Authorization": "Bearer token"})
+    assert error.status_code == 404
+    assert error.headers["cache-control"] == "no-store"
+
+
+def test_namespace_bump_missed_before_subscribing_is_read_from_redis(redis_server: fakeredis.FakeServer) -> None:
+    async def scenario() -> None:
+        worker = load_cache_worker(redis_server)
+        assert await cache_module.namespace_generation("items") == 0
+
+        # published before this worker subscribed, e.g. at startup or while its connection was down
+        await worker.invalidate([], namespaces=["items"])
+        assert await cache_module.namespace_generation("items") == 1
+
+        listener = asyncio.create_task(cache_module.listen_for_invalidations())
+        await wait_until(lambda: cache_module.subscribed)
+        await worker.invalidate([], namespaces=["items"])
+        await wait_until(lambda: cache_module.namespace_generations.get("items") == 2)
+        assert await cache_module.namespace_generation("items") == 2
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        assert not cache_module.subscribed
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_by_another_worker_evicts_local_entries(redis_server: fakeredis.FakeServer) -> None:
+    async def scenario() -> None:
+        worker = load_cache_worker(redis_server)
+        listener = asyncio.create_task(cache_module.listen_for_invalidations())
+        await wait_until(lambda: cache_module.subscribed)
+
+        for local_cache in (cache_module.local_cache, worker.local_cache):
+            for key in ("item:1", "item:2", "items:page:1", "other:1"):
+                local_cache.set(key, b"cached", size=6, ttl=60)  # type: ignore[union-attr]
+
+        await worker.invalidate(["item:1"])
+        await worker._invalidate_or_queue(worker.Invalidation(keys=[], patterns=["items:*"], tags=[], namespaces=[]))
+        assert worker.local_cache.get("item:1") is None
+
+        local_cache = cache_module.local_cache
+        await wait_until(lambda: local_cache.get("items:page:1") is None)  # type: ignore[union-attr]
+        assert local_cache.get("item:1") is None  # type: ignore[union-attr]
+        assert local_cache.get("item:2") == local_cache.get("other:1") == b"cached"  # type: ignore[union-attr]
+
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("backend", [None, "memory"])
+def test_creating_a_product_works_with_or_without_a_cache_backend(
+    monkeypatch: pytest.MonkeyPatch, backend: str | None
+) -> None:
+    monkeypatch.setattr(cache_module, "backend", MemoryBackend() if backend else None)
+    monkeypatch.setattr(cache_module, "namespace_generations", {})
+    product = ProductCreate(name="Product", description="A product", category_id=1)
+
+    with patch.object(products.crud_products, "create", AsyncMock(return_value=SimpleNamespace(id=1))):
+        created = asyncio.run(products.write_product(product, {"id": 1}, None))  # type: ignore[arg-type]
+
+    assert created.id == 1
+    if backend:
+        assert asyncio.run(cache_module.namespace_generation("products")) == 1
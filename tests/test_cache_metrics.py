@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app.api.dependencies import get_current_superuser
+from src.app.api.v1 import cache as cache_api
+from src.app.core.utils import cache, cache_metrics
+from src.app.core.utils.cache_metrics import (
+    METRICS_KEY,
+    CacheMetrics,
+    HotKeyTracker,
+    merge_snapshots,
+    prefix_to_pattern,
+    read_metrics,
+    sample_memory_by_prefix,
+)
+
+
+def test_decayed_hot_keys_make_room_for_new_traffic() -> None:
+    tracker = HotKeyTracker(top_k=2, width=64, depth=4)
+    for _ in range(8):
+        tracker.record("product_cache:1", hit=True)
+    tracker.record("product_cache:2", hit=True)
+
+    # a key looked up once does not survive a decay, and the table follows the new traffic
+    tracker.decay()
+    assert [hot_key["key"] for hot_key in tracker.snapshot()] == ["product_cache:1"]
+    assert tracker.snapshot()[0] == {"key": "product_cache:1", "estimate": 4, "hits": 4, "lookups": 4}
+
+    for _ in range(3):
+        for _ in range(6):
+            tracker.record("product_cache:3", hit=False)
+        tracker.decay()
+    assert [hot_key["key"] for hot_key in tracker.snapshot()] == ["product_cache:3"]
+
+
+def _worker_snapshot(hits: int, misses: int, lookup_seconds: float) -> dict[str, Any]:
+    metrics = CacheMetrics()
+    metrics.increment("products", "hit", hits)
+    metrics.increment("products", "miss", misses)
+    metrics.observe("products", "lookup", lookup_seconds)
+    for _ in range(hits):
+        metrics.hot_keys.record("products:1", hit=True)
+    for _ in range(misses):
+        metrics.hot_keys.record("products:1", hit=False)
+    return metrics.snapshot()
+
+
+def test_merged_snapshots_sum_workers_and_compute_hit_ratios() -> None:
+    merged = merge_snapshots([_worker_snapshot(3, 1, 0.002), _worker_snapshot(1, 3, 0.2)])
+
+    products = merged["prefixes"]["products"]
+    assert merged["workers"] == 2
+    assert products["counters"] == {"hit": 4, "miss": 4}
+    assert products["hit_ratio"] == 0.5
+
+    lookup = products["latencies"]["lookup"]
+    assert lookup["count"] == 2
+    assert lookup["sum"] == pytest.approx(0.202)
+    assert sum(lookup["counts"]) == 2
+    assert lookup["counts"][2] == lookup["counts"][8] == 1
+
+    assert merged["hot_keys"] == [{"key": "products:1", "estimate": 8, "hits": 4, "lookups": 8, "hit_ratio": 0.5}]
+
+
+def test_merged_snapshot_without_lookups_has_no_hit_ratio() -> None:
+    metrics = CacheMetrics()
+    metrics.increment("products", "invalidation")
+
+    assert merge_snapshots([metrics.snapshot()])["prefixes"]["products"]["hit_ratio"] is None
+
+
+def test_read_metrics_drops_workers_that_stopped_publishing() -> None:
+    async def scenario() -> tuple[dict[str, Any], dict[bytes, bytes]]:
+        client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+        live, stale = _worker_snapshot(1, 0, 0.001), _worker_snapshot(0, 5, 0.001)
+        stale["updated_at"] = time.time() - 300
+        await client.hset(METRICS_KEY, mapping={"live": json.dumps(live), "stale": json.dumps(stale)})
+
+        merged = await read_metrics(client, max_age=30)
+        return merged, await client.hgetall(METRICS_KEY)
+
+    merged, remaining = asyncio.run(scenario())
+    assert merged["workers"] == 1
+    assert merged["prefixes"]["products"]["counters"] == {"hit": 1, "miss": 0}
+    assert list(remaining) == [b"live"]
+
+
+def test_prefix_to_pattern_replaces_template_fields() -> None:
+    assert prefix_to_pattern("products:items_per_page_{items_per_page}:page") == "products:items_per_page_*:page:*"
+    assert prefix_to_pattern("user") == "user:*"
+
+
+class MemoryRedis:
+    """Stands in for a Redis client answering SCAN, MEMORY USAGE and DBSIZE, which fakeredis lacks."""
+
+    def __init__(self, usages: dict[str, int], total_keys: int) -> None:
+        self.usages = usages
+        self.total_keys = total_keys
+        self.measured: list[str] = []
+
+    async def scan_iter(self, count: int) -> AsyncGenerator[bytes, None]:
+        for key in self.usages:
+            yield key.encode()
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool) -> AsyncGenerator["MemoryRedis", None]:
+        self.measured = []
+        yield self
+
+    def memory_usage(self, key: bytes) -> None:
+        self.measured.append(key.decode())
+
+    async def execute(self) -> list[int]:
+        return [self.usages[key] for key in self.measured]
+
+    async def dbsize(self) -> int:
+        return self.total_keys
+
+
+def test_memory_is_sampled_and_extrapolated_by_prefix() -> None:
+    usages = {"products:items_per_page_10:page:1": 100, "products:items_per_page_10:page:2": 300, "user:1": 50}
+    client = MemoryRedis(usages, total_keys=30)
+    prefixes = {"products:items_per_page_{items_per_page}:page", "user"}
+
+    memory = asyncio.run(sample_memory_by_prefix(client, prefixes, sample_size=2))  # type: ignore[arg-type]
+
+    # two keys out of 30 are sampled, so each one stands for 15
+    assert memory["sampled_keys"] == 2
+    assert memory["prefixes"]["products:items_per_page_{items_per_page}:page"] == {
+        "sampled_keys": 2,
+        "sampled_bytes": 400,
+        "estimated_bytes": 6000,
+    }
+    assert memory["prefixes"]["user"] == {"sampled_keys": 0, "sampled_bytes": 0, "estimated_bytes": 0}
+
+
+def _cache_api(monkeypatch: pytest.MonkeyPatch, redis: bool) -> TestClient:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator:
+        # created in the test client's event loop
+        monkeypatch.setattr(cache, "client", fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()) if redis else None)
+        yield
+
+    monkeypatch.setattr(cache_metrics, "metrics", CacheMetrics())
+    cache_metrics.metrics.increment("products", "hit", 3)
+    cache_metrics.metrics.increment("products", "miss", 1)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(cache_api.router)
+    app.dependency_overrides[get_current_superuser] = lambda: {"is_superuser": True}
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("redis", [False, True])
+def test_metrics_endpoint_aggregates_this_worker(monkeypatch: pytest.MonkeyPatch, redis: bool) -> None:
+    with _cache_api(monkeypatch, redis) as client:
+        response = client.get("/cache/metrics")
+
+    assert response.status_code == 200
+    assert response.json()["workers"] == 1
+    assert response.json()["prefixes"]["products"]["hit_ratio"] == 0.75
+
+
+def test_memory_endpoint_without_redis_is_not_implemented(monkeypatch: pytest.MonkeyPatch) -> None:
+    with _cache_api(monkeypatch, redis=False) as client:
+        response = client.get("/cache/memory")
+
+    assert response.status_code == 501
+    assert response.json() == {"detail": "Memory sampling requires the Redis cache backend."}
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+
+from src.app.core.utils import cache as cache_module
+from src.app.core.utils import cache_warmer
+from src.app.core.utils.cache_warmer import CacheWarmer
+from tests.conftest import FlakyBackend
+
+
+def test_warm_up_requests_are_bounded_and_flagged() -> None:
+    app = FastAPI()
+    in_flight: list[int] = [0, 0]
+    flagged: list[bool] = []
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict[str, int]:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        flagged.append(cache_warmer.warming.get())
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return {"id": item_id}
+
+    warmer = CacheWarmer(app, [f"/items/{item_id}" for item_id in range(6)], concurrency=2)
+    asyncio.run(warmer.warm())
+
+    assert in_flight[1] == 2
+    assert flagged == [True] * 6
+    assert not cache_warmer.warming.get()
+
+
+def test_schedules_during_a_run_are_coalesced_into_one_rerun() -> None:
+    app = FastAPI()
+    runs: list[int] = []
+
+    @app.get("/items")
+    async def read_items() -> list[int]:
+        runs.append(len(runs))
+        await asyncio.sleep(0.01)
+        return []
+
+    async def scenario() -> None:
+        warmer = CacheWarmer(app, ["/items"])
+        warmer.schedule()
+        await asyncio.sleep(0)
+        for _ in range(3):
+            warmer.schedule()
+        await warmer._task  # type: ignore[misc]
+        await warmer.close()
+
+    asyncio.run(scenario())
+    assert runs == [0, 1]
+
+
+def test_write_with_rewarm_refills_the_invalidated_entry(
+    cache_backend: FlakyBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    app = FastAPI()
+    calls: list[int] = []
+
+    @app.get("/items/{item_id}")
+    @cache_module.cache("item", resource_id_name="item_id")
+    async def read_item(request: Request, item_id: int) -> dict[str, int]:
+        calls.append(item_id)
+        return {"id": item_id, "version": len(calls)}
+
+    @cache_module.cache("item", resource_id_name="item_id", rewarm=True)
+    async def write_item(request: Request, item_id: int) -> None:
+        return None
+
+    warmer = CacheWarmer(app, ["/items/1"])
+    monkeypatch.setattr(cache_warmer, "warmer", warmer)
+
+    async def scenario() -> None:
+        await warmer.warm()
+        request = Request({"type": "http", "method": "PATCH", "path": "/", "query_string": b"", "headers": []})
+        await write_item(request, item_id=1)
+        assert await cache_backend.get("item:1") is None
+
+        await warmer._task  # type: ignore[misc]
+        assert await cache_backend.get("item:1") is not None
+        await warmer.close()
+
+    asyncio.run(scenario())
+    assert calls == [1, 1]
@@ -0,0 +1,128 @@
+import zlib
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.app.core.utils import cache as cache_module
+from src.app.core.utils.cache_codecs import get_codec
+from src.app.middleware.client_cache_middleware import ClientCacheMiddleware
+from src.app.middleware.compression_middleware import CompressionMiddleware
+from tests.conftest import FlakyBackend
+
+BODY = b'{"data":"' + b"x" * 4096 + b'"}'
+
+
+def _client(streaming: bool = True) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small() -> Response:
+        return Response(b'{"data":"x"}', media_type="application/json")
+
+    @app.get("/large")
+    async def large() -> Response:
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks() -> Any:
+            for _ in range(4):
+                yield b"x" * 1024
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/no-transform")
+    async def no_transform() -> Response:
+        return Response(BODY, media_type="application/json", headers={"Cache-Control": "no-transform"})
+
+    @app.get("/encoded")
+    async def encoded() -> Response:
+        return Response(zlib.compress(BODY), media_type="application/json", headers={"Content-Encoding": "deflate"})
+
+    @app.get("/page/{page_id}")
+    @cache_module.cache("page", resource_id_name="page_id", codec="gzip")
+    async def read_page(request: Request, page_id: int) -> Response:
+        return Response(BODY, media_type="application/json")
+
+    # as in `create_application`, the compression middleware runs inside the client cache middleware
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=("gzip", "deflate"), streaming=streaming)
+    app.add_middleware(ClientCacheMiddleware, max_age=30)
+    return TestClient(app)
+
+
+def test_bodies_below_the_minimum_size_are_not_compressed() -> None:
+    client = _client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.content == b'{"data":"x"}'
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert int(large.headers["content-length"]) < len(BODY)
+    assert large.content == BODY
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "content_encoding"),
+    [
+        ("gzip, deflate", "gzip"),
+        ("gzip;q=0.5, deflate", "deflate"),
+        ("gzip;q=0, deflate;q=0", None),
+        ("*;q=0", None),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_content_coding_follows_accept_encoding(accept_encoding: str, content_encoding: str | None) -> None:
+    response = _client().get("/large", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers.get("content-encoding") == content_encoding
+    assert response.content == BODY
+
+
+def test_streamed_responses_are_compressed_incrementally() -> None:
+    response = _client().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"x" * 4096
+
+    response = _client(streaming=False).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"x" * 4096
+
+
+def test_cached_compressed_variant_is_sent_and_validated(cache_backend: FlakyBackend) -> None:
+    client = _client()
+    first = client.get("/page/1", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].endswith('-gzip"')
+
+    gzip_codec = get_codec("gzip")
+    with patch.object(gzip_codec, "compress", wraps=gzip_codec.compress) as compress:
+        hit = client.get("/page/1", headers={"Accept-Encoding": "gzip"})
+
+    # the bytes stored by the cache decorator are sent as they are
+    compress.assert_not_called()
+    assert hit.headers["content-encoding"] == "gzip"
+    assert hit.headers["etag"] == first.headers["etag"]
+    assert hit.content == BODY
+
+    not_modified = client.get("/page/1", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == first.headers["etag"]
+    assert not_modified.content == b""
+
+
+@pytest.mark.parametrize("path", ["/no-transform", "/encoded"])
+def test_responses_that_must_not_be_transformed_pass_through(path: str) -> None:
+    response = _client().get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers.get("content-encoding") != "gzip"
+    assert "Accept-Encoding" not in response.headers.get("vary", "")
+    assert response.content == BODY
@@ -0,0 +1,109 @@
+import asyncio
+import ipaddress
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from src.app.api.dependencies import rate_limiter
+from src.app.core.db.database import async_get_db
+from src.app.core.utils import cache_warmer, rate_limit
+from src.app.core.utils.local_cache import LocalCache
+from src.app.core.utils.rate_limit import _retry_after
+
+
+@pytest.fixture
+def limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rate_limit, "client", fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+    monkeypatch.setattr(rate_limit, "local_share", 0.0)
+    monkeypatch.setattr(rate_limit, "local_counts", LocalCache())
+    monkeypatch.setattr(rate_limit, "trusted_proxies", [])
+
+
+async def _check_at(timestamp: float, key: str, requests: int) -> list[int | None]:
+    with patch("src.app.core.utils.rate_limit.time.time", return_value=timestamp):
+        return [await rate_limit.check(key, limit=10, period=60) for _ in range(requests)]
+
+
+def test_retry_after_waits_for_the_weighted_count_to_decay() -> None:
+    # the previous window's 10 requests weigh 10 * (60 - elapsed) / 60, on top of the current window's 8
+    assert _retry_after(limit=10, period=60, elapsed=40, current=8, previous=10) == 14
+
+    # a full current window has to become the previous one and decay to leave room for one request
+    assert _retry_after(limit=10, period=60, elapsed=40, current=10, previous=0) == 26
+
+
+def test_sliding_window_weights_the_previous_window(limiter: None) -> None:
+    async def scenario() -> tuple[list[int | None], list[int | None]]:
+        # the window [120, 180) fills up, then halfway through the next one its 10 requests weigh 5
+        return await _check_at(120.0, "client", 11), await _check_at(210.0, "client", 6)
+
+    first_window, next_window = asyncio.run(scenario())
+    assert first_window == [None] * 10 + [66]
+    assert next_window == [None] * 5 + [6]
+
+
+def test_local_share_saves_redis_calls_without_exceeding_the_limit(limiter: None) -> None:
+    rate_limit.local_share = 0.5
+    with patch.object(rate_limit.client, "eval", wraps=rate_limit.client.eval) as evaluate:  # type: ignore[union-attr]
+        results = asyncio.run(_check_at(300.0, "client", 20))
+
+    assert results == [None] * 10 + [66] * 10
+    assert evaluate.call_count < 20
+
+
+def test_rate_limited_route_answers_429_with_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator:
+        # created in the test client's event loop
+        monkeypatch.setattr(rate_limit, "client", fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        yield
+
+    monkeypatch.setattr(rate_limit, "local_share", 0.0)
+    monkeypatch.setattr(rate_limit, "local_counts", LocalCache())
+    app = FastAPI(lifespan=lifespan)
+    app.dependency_overrides[async_get_db] = lambda: None
+
+    @app.get("/items", dependencies=[Depends(rate_limiter(limit=2, period=60))])
+    async def read_items() -> list[int]:
+        return []
+
+    with TestClient(app) as client:
+        statuses = [client.get("/items").status_code for _ in range(3)]
+        response = client.get("/items")
+
+    assert statuses == [200, 200, 429]
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 120
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rate_limit, "trusted_proxies", [ipaddress.ip_network("172.16.0.0/12")])
+
+    assert rate_limit.client_address("172.18.0.5", "203.0.113.7") == "203.0.113.7"
+    # the client's own header is on the left, the address the proxy saw is the rightmost untrusted one
+    assert rate_limit.client_address("172.18.0.5", "198.51.100.1, 203.0.113.7, 172.18.0.9") == "203.0.113.7"
+    assert rate_limit.client_address("203.0.113.7", "198.51.100.1") == "203.0.113.7"
+    assert rate_limit.client_address(None, None) == "unknown"
+
+
+def test_cache_warm_up_requests_are_not_rate_limited(limiter: None) -> None:
+    limit_rate = rate_limiter(limit=1, period=60)
+    request = Request({"type": "http", "method": "GET", "path": "/items", "headers": [], "client": ("127.0.0.1", 1)})
+
+    async def scenario() -> None:
+        token = cache_warmer.warming.set(True)
+        for _ in range(3):
+            await limit_rate(request, user=None)
+        cache_warmer.warming.reset(token)
+
+        await limit_rate(request, user=None)
+        with pytest.raises(HTTPException) as exc_info:
+            await limit_rate(request, user=None)
+        assert exc_info.value.status_code == 429
+
+    asyncio.run(scenario())